@@ -3,6 +3,9 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 from datetime import datetime
 from math import fsum
+import os
+import threading
+import requests
 
 from . import SessionLocal
 from models.train import Train, TrainPassengerCar
@@ -12,6 +15,22 @@ from auth import authenticate, authorize
 
 train_blueprint = Blueprint('train_routes', __name__)
 
+SCHEDULE_TRAINS_WEBHOOK = 'http://127.0.0.1:5000/webhooks/fleet/trains'
+# Shared secret with the schedule service; without it no webhook is sent
+WEBHOOK_SECRET = os.environ.get('WEBHOOK_SECRET')
+
+def _post_schedule_webhook():
+    try:
+        requests.post(SCHEDULE_TRAINS_WEBHOOK, headers={'X-Webhook-Secret': WEBHOOK_SECRET}, timeout=2)
+    except requests.RequestException:
+        pass  # Schedule falls back to its cache TTL if it is unreachable
+
+def notify_schedule():
+    """ Tell the schedule service to drop its cached train list, without blocking the response """
+    if not WEBHOOK_SECRET:
+        return  # Schedule falls back to its cache TTL
+    threading.Thread(target=_post_schedule_webhook, daemon=True).start()
+
 def serialize_train(train):
     """ Serialize a Train including its Railcar and associated PassengerCars """
     railcar_data = None
@@ -187,6 +206,7 @@ def create_train():
                     session.add(assoc)
 
             session.commit()
+            notify_schedule()
             return jsonify({"message": "Train created successfully", "trainID": train.trainID}), 201
 
         except IntegrityError as ie:
@@ -291,6 +311,7 @@ def update_train(train_id):
                     session.add(assoc)
 
             session.commit()
+            notify_schedule()
             return jsonify({"message": "Train updated successfully"}), 200
 
         except IntegrityError as ie:
@@ -327,6 +348,7 @@ def delete_train(train_id):
             # Delete the train
             session.delete(train)
             session.commit()
+            notify_schedule()
             return jsonify({"message": f"Train with ID {train_id} deleted successfully"}), 200
 
         except IntegrityError as ie:
@@ -35,8 +35,9 @@ export const useUserStore = defineStore('user', {
                     lastName: user.lastName,
                     role: user.role,
                     department: user.department,
-                    rideExecutions: user.rideExecutions
+                    rideExecutions: []
                 }
+                await this.fetchRoster();
                 return true
             }
             return false
@@ -50,6 +51,18 @@ export const useUserStore = defineStore('user', {
             } catch (error) {
                 console.error("Fehler beim Laden der Daten", error);
             }
+        },
+        async fetchRoster(from, to) {
+             //Dienstplan des eingeloggten Benutzers holen, ohne Zeitraum die kommende Woche
+            if (!this.user.ssn) return;
+            try {
+                const response = await axios.get(`http://127.0.0.1:5000/employees/${this.user.ssn}/roster`, {
+                    params: { from, to }
+                });
+                this.user.rideExecutions = response.data;
+            } catch (error) {
+                console.error("Fehler beim Laden des Dienstplans", error);
+            }
         }
     }
 })
\ No newline at end of file
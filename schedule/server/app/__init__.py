@@ -1,25 +1,42 @@
 import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from os import path
-from flask_migrate import Migrate
+from flask_migrate import Migrate, upgrade
 
 db = SQLAlchemy()
 DB_NAME = "database.db"
-DATABASE_URL = f"sqlite:///{os.path.abspath('server/db/database.db')}"
+DATABASE_URL = os.environ.get('SCHEDULE_DATABASE_URL', f"sqlite:///{os.path.abspath('server/db/database.db')}")
 
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'asdf'
 app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
+app.config['FLEET_TRAINS_CACHE_TTL'] = int(os.environ.get('FLEET_TRAINS_CACHE_TTL', 60))  # Sekunden
+app.config['TRACK_SERVICE_URL'] = os.environ.get('TRACK_SERVICE_URL', 'http://127.0.0.1:5001')
+app.config['FLEET_SERVICE_URL'] = os.environ.get('FLEET_SERVICE_URL', 'http://127.0.0.1:5002')
+app.config['SERVICE_CONNECT_TIMEOUT'] = float(os.environ.get('SERVICE_CONNECT_TIMEOUT', 2))  # Sekunden
+app.config['SERVICE_READ_TIMEOUT'] = float(os.environ.get('SERVICE_READ_TIMEOUT', 5))  # Sekunden
+# Gemeinsames Geheimnis für die Webhooks von Track- und Fleet-Service (Header X-Webhook-Secret)
+app.config['WEBHOOK_SECRET'] = os.environ.get('WEBHOOK_SECRET')
+app.config['TRACK_REPLICATION_INTERVAL'] = int(os.environ.get('TRACK_REPLICATION_INTERVAL', 30))  # Sekunden
+# False: Replikation nicht im Webserver, sondern im eigenen Worker (`flask replicate-tracks`)
+app.config['TRACK_REPLICATION_IN_PROCESS'] = os.environ.get('TRACK_REPLICATION_IN_PROCESS', '1') != '0'
+app.config['TURNAROUND_BUFFER_MINUTES'] = int(os.environ.get('TURNAROUND_BUFFER_MINUTES', 10))
+app.config['RIDE_ARCHIVE_DIR'] = os.environ.get('RIDE_ARCHIVE_DIR', os.path.abspath('server/db/archive'))
+app.config['RIDE_ARCHIVE_HORIZON_DAYS'] = int(os.environ.get('RIDE_ARCHIVE_HORIZON_DAYS', 365))
+app.config['GTFS_AGENCY_NAME'] = os.environ.get('GTFS_AGENCY_NAME', 'Railway Management System')
+app.config['GTFS_AGENCY_URL'] = os.environ.get('GTFS_AGENCY_URL', 'http://127.0.0.1:3000')
 db.init_app(app)
-migrate = Migrate(app, db)
+migrate = Migrate(app, db, directory=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations'))
 
 def create_database(app):
-    if not path.exists('website/' + DB_NAME):
-        with app.app_context():
-            db.create_all()
-            print('Created Database!')
+    # Schema über die Migrationen in server/migrations anlegen bzw. auf den neuesten Stand bringen
+    with app.app_context():
+        upgrade()
+
+        # Auswertungssummen beim ersten Start aus den bestehenden Fahrten aufbauen
+        from app.analytics import rebuild_summaries_if_empty
+        rebuild_summaries_if_empty()
 
 from app import routes
 
@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+from sqlalchemy.dialects.sqlite import insert
+
+from app import db
+from app.models import RideExecution, RideDailySummary, RideMonthlySummary, Stopplan, Section, track_section
+
+
+def is_active():
+    # Nur nicht stornierte Fahrten zählen zum Umsatz
+    return db.or_(RideExecution.isCanceled.is_(None), RideExecution.isCanceled == False)
+
+
+def ride_totals(*conditions, canceled=False):
+    # Anzahl und Umsatz der passenden nicht stornierten (bzw. stornierten) Fahrten je Stopplan und Tag
+    state = RideExecution.isCanceled == True if canceled else is_active()
+    return db.session.query(
+        RideExecution.stopplanID, RideExecution.date, db.func.count(RideExecution.id),
+        db.func.coalesce(db.func.sum(RideExecution.price), 0)
+    ).filter(state, *conditions).group_by(RideExecution.stopplanID, RideExecution.date).all()
+
+
+def upsert_summary(model, period_column, totals):
+    # Differenzen per INSERT ... ON CONFLICT DO UPDATE auf die bestehenden Summen addieren
+    if not totals:
+        return
+    statement = insert(model.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=['stopplanID', period_column],
+        set_={'rides': model.__table__.c.rides + statement.excluded.rides,
+              'revenue': model.__table__.c.revenue + statement.excluded.revenue}
+    )
+    db.session.execute(statement, [
+        {'stopplanID': stopplan_id, period_column: period, 'rides': rides, 'revenue': revenue}
+        for (stopplan_id, period), (rides, revenue) in totals.items()
+    ])
+
+
+def apply_summary_deltas(rows, sign=1):
+    # Zeilen (stopplanID, Datum, Anzahl, Umsatz) mit Vorzeichen in Tages- und Monatssummen übernehmen;
+    # wird in derselben Transaktion wie die Änderung an den Fahrten ausgeführt
+    daily = defaultdict(lambda: [0, 0.0])
+    monthly = defaultdict(lambda: [0, 0.0])
+    for stopplan_id, date, rides, revenue in rows:
+        for totals, period in ((daily, date), (monthly, date.replace(day=1))):
+            totals[(stopplan_id, period)][0] += sign * rides
+            totals[(stopplan_id, period)][1] += sign * (revenue or 0)
+    upsert_summary(RideDailySummary, 'date', daily)
+    upsert_summary(RideMonthlySummary, 'month', monthly)
+
+
+def add_rides(*conditions):
+    apply_summary_deltas(ride_totals(*conditions), 1)
+
+
+def remove_rides(*conditions):
+    apply_summary_deltas(ride_totals(*conditions), -1)
+
+
+def rebuild_summaries():
+    # Summen vollständig aus den Fahrten neu berechnen
+    db.session.execute(db.delete(RideDailySummary))
+    db.session.execute(db.delete(RideMonthlySummary))
+    add_rides()
+
+
+def rebuild_summaries_if_empty():
+    # Beim ersten Start mit bestehenden Fahrten die Summentabellen befüllen
+    if not db.session.query(RideDailySummary.id).first() and db.session.query(RideExecution.id).first():
+        rebuild_summaries()
+        db.session.commit()
+
+
+def usage_fee_per_ride():
+    # Summe der Nutzungsgebühren aller Abschnitte der Strecke je Stopplan
+    return dict(db.session.query(Stopplan.id, db.func.sum(Section.usageFee)).join(
+        track_section, track_section.c.track_id == Stopplan.trackID
+    ).join(
+        Section, Section.id == track_section.c.section_id
+    ).group_by(Stopplan.id))
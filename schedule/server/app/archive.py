@@ -0,0 +1,185 @@
+import gzip
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date as date_type, datetime, timedelta
+from types import SimpleNamespace
+
+from app import db
+from app.models import RideExecution, execution_employee
+from app.bulk import chunked, BATCH_SIZE
+from app.pagination import ride_key
+
+# Anzahl entpackt vorgehaltener Monatssegmente
+SEGMENT_CACHE_SIZE = 12
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def next_month(value):
+    return (value.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def segment_path(archive_dir, month):
+    # Ein komprimiertes JSONL-Segment pro Monat
+    return os.path.join(archive_dir, f'rideExecutions-{month.strftime("%Y-%m")}.jsonl.gz')
+
+
+def archived_months(archive_dir):
+    # Monate, für die es ein Archivsegment gibt, aufsteigend
+    if not os.path.isdir(archive_dir):
+        return []
+    months = []
+    for name in os.listdir(archive_dir):
+        if name.startswith('rideExecutions-') and name.endswith('.jsonl.gz'):
+            months.append(datetime.strptime(name[len('rideExecutions-'):-len('.jsonl.gz')], '%Y-%m').date())
+    return sorted(months)
+
+
+def archive_row(ride, employee_ssns):
+    return {
+        'id': ride.id,
+        'price': ride.price,
+        'isCanceled': ride.isCanceled,
+        'delay': ride.delay,
+        'date': ride.date.isoformat(),
+        'time': ride.time.strftime('%H:%M:%S'),
+        'trainID': ride.trainID,
+        'stopplanID': ride.stopplanID,
+        'batchID': ride.batchID,
+        'employees': employee_ssns
+    }
+
+
+def decode_segment(path):
+    # Alle Fahrten eines Segments in der Reihenfolge (date, time, id)
+    with gzip.open(path, 'rt', encoding='utf-8') as segment:
+        rows = [json.loads(line) for line in segment if line.strip()]
+    rides = [SimpleNamespace(**dict(row, date=date_type.fromisoformat(row['date']),
+                                    time=datetime.strptime(row['time'], '%H:%M:%S').time())) for row in rows]
+    rides.sort(key=ride_key)
+    return rides, [ride_key(ride) for ride in rides]
+
+
+class SegmentCache:
+    # Zuletzt gelesene Segmente entpackt vorhalten; ein Segment wird erst neu gelesen, wenn sich seine
+    # Datei geändert hat (z.B. durch archive-rides in einem anderen Prozess)
+
+    def __init__(self, size=SEGMENT_CACHE_SIZE):
+        self.size = size
+        self._segments = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        # (Fahrten, Schlüssel) des Segments; die Fahrten dürfen nicht verändert werden
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._segments.get(path)
+            if cached and cached[0] == version:
+                self._segments.move_to_end(path)
+                return cached[1]
+
+        segment = decode_segment(path)
+        with self._lock:
+            self._segments[path] = (version, segment)
+            self._segments.move_to_end(path)
+            while len(self._segments) > self.size:
+                self._segments.popitem(last=False)
+        return segment
+
+
+segments = SegmentCache()
+
+
+def read_segment(path):
+    # Alle Fahrten eines Segments in der Reihenfolge (date, time, id)
+    return segments.get(path)[0]
+
+
+def generation_path(archive_dir):
+    # Wird bei jeder Archivierung berührt, damit laufende Server zwischengespeicherte Fahrplandaten verwerfen
+    return os.path.join(archive_dir, '.generation')
+
+
+def touch_generation(archive_dir):
+    with open(generation_path(archive_dir), 'w') as marker:
+        marker.write(datetime.now().isoformat())
+
+
+def write_segment(path, rides):
+    # Fahrten an ein Segment anhängen; bereits archivierte IDs werden übersprungen
+    existing = {ride.id for ride in read_segment(path)} if os.path.exists(path) else set()
+    with gzip.open(path, 'at', encoding='utf-8') as segment:
+        for ride, employee_ssns in rides:
+            if ride.id not in existing:
+                segment.write(json.dumps(archive_row(ride, employee_ssns)) + '\n')
+
+
+def archive_rides(before, archive_dir, batch_size=BATCH_SIZE):
+    # Fahrten vor dem Stichtag monatsweise samt Mitarbeiterzuordnungen ins Archiv verschieben;
+    # das Segment wird vor dem Löschen geschrieben, ein erneuter Lauf überspringt bereits archivierte IDs
+    os.makedirs(archive_dir, exist_ok=True)
+    first = db.session.query(db.func.min(RideExecution.date)).filter(RideExecution.date < before).scalar()
+    archived = 0
+    month = month_start(first) if first else None
+    while month and month < before:
+        end = min(next_month(month), before)
+        rides = RideExecution.query.filter(RideExecution.date >= month, RideExecution.date < end) \
+            .order_by(RideExecution.date, RideExecution.time, RideExecution.id).all()
+        if rides:
+            ride_ids = [ride.id for ride in rides]
+            crews = {}
+            for chunk in chunked(ride_ids, batch_size):
+                for execution_id, ssn in db.session.query(
+                        execution_employee.c.execution_id, execution_employee.c.employee_ssn
+                ).filter(execution_employee.c.execution_id.in_(chunk)):
+                    crews.setdefault(execution_id, []).append(str(ssn))  # wie Employee.ssn
+
+            write_segment(segment_path(archive_dir, month), [(ride, crews.get(ride.id, [])) for ride in rides])
+
+            for chunk in chunked(ride_ids, batch_size):
+                db.session.execute(execution_employee.delete().where(execution_employee.c.execution_id.in_(chunk)))
+                db.session.execute(db.delete(RideExecution).where(RideExecution.id.in_(chunk)),
+                                   execution_options={'synchronize_session': False})
+            db.session.commit()
+            archived += len(rides)
+        month = next_month(month)
+    if archived:
+        touch_generation(archive_dir)
+    return archived
+
+
+def drop_segment(archive_dir, month):
+    # Einen ganzen archivierten Monat durch Löschen seines Segments entfernen
+    path = segment_path(archive_dir, month)
+    if not os.path.exists(path):
+        return False
+    os.remove(path)
+    touch_generation(archive_dir)
+    return True
+
+
+def read_archived_rides(archive_dir, date_from, date_to=None, stopplan_id=None, train_id=None, after=None):
+    # Archivierte Fahrten im Zeitraum nach (date, time, id) geordnet; Segmente werden erst bei Bedarf gelesen
+    # und ab der ersten passenden Fahrt per Binärsuche durchlaufen
+    start = max(date_from, after[0]) if after else date_from
+    for month in archived_months(archive_dir):
+        if next_month(month) <= start:
+            continue
+        if date_to and month > date_to:
+            break
+        rides, keys = segments.get(segment_path(archive_dir, month))
+        index = bisect_right(keys, after) if after and after[0] >= date_from else bisect_left(keys, (date_from,))
+        for ride in rides[index:]:
+            if date_to and ride.date > date_to:
+                return
+            if stopplan_id and ride.stopplanID != stopplan_id:
+                continue
+            if train_id and ride.trainID != train_id:
+                continue
+            yield ride
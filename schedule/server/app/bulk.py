@@ -0,0 +1,39 @@
+from itertools import islice
+
+from app import db
+from app.models import RideExecution, execution_employee
+
+# Anzahl der Zeilen pro executemany-Aufruf
+BATCH_SIZE = 1000
+
+
+def chunked(rows, size=BATCH_SIZE):
+    # Liste oder Generator in Blöcke fester Größe aufteilen, ohne Generatoren vorab ganz auszulesen
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_create_ride_executions(slots, values, employee_ssns, batch_size=BATCH_SIZE):
+    # Fahrtdurchführungen als einfache Zeilen blockweise einfügen, ohne ORM-Objekte pro Fahrt
+    ride_table = RideExecution.__table__
+    insert_rides = ride_table.insert().returning(ride_table.c.id, sort_by_parameter_order=True)
+
+    ride_ids = []
+    for chunk in chunked(slots, batch_size):
+        rows = [dict(values, date=date, time=slot_time) for date, slot_time in chunk]
+        chunk_ids = list(db.session.execute(insert_rides, rows).scalars())
+        ride_ids.extend(chunk_ids)
+
+        # Zuordnungen der Mitarbeiter ebenfalls gesammelt einfügen
+        assignments = [
+            {'execution_id': ride_id, 'employee_ssn': ssn}
+            for ride_id in chunk_ids for ssn in employee_ssns
+        ]
+        for assignment_chunk in chunked(assignments, batch_size):
+            db.session.execute(execution_employee.insert(), assignment_chunk)
+
+    return ride_ids
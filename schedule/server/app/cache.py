@@ -0,0 +1,75 @@
+import threading
+import time
+import traceback
+
+
+class TTLCache:
+    # Zwischenspeicher für einen einzelnen Wert mit Ablaufzeit (stale-while-revalidate);
+    # der Loader läuft nie unter self._lock, damit wartende Requests nicht hinter einem langsamen Abruf stehen
+
+    def __init__(self, loader, ttl):
+        self.loader = loader
+        self.ttl = ttl
+        self._value = None
+        self._loaded = False
+        self._expires_at = 0
+        self._refreshing = False
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._initial_load = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._loaded:
+                # Abgelaufen: alten Wert sofort liefern und im Hintergrund neu laden
+                if time.monotonic() >= self._expires_at and not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh, args=(self._generation,), daemon=True).start()
+                return self._value
+
+        # Noch nie geladen: es gibt keinen alten Wert, also synchron laden, aber nur ein Abruf gleichzeitig
+        with self._initial_load:
+            with self._lock:
+                if self._loaded:
+                    return self._value
+                generation = self._generation
+            value = self.loader()
+            with self._lock:
+                self._store(value)
+                # Während des Abrufs ungültig gemacht: Wert verwenden, beim nächsten Zugriff neu laden
+                if generation != self._generation:
+                    self._expires_at = 0
+            return value
+
+    def invalidate(self):
+        # Wert als abgelaufen markieren: der nächste Zugriff liefert ihn noch und lädt im Hintergrund neu
+        with self._lock:
+            self._expires_at = 0
+            self._generation += 1
+
+    def clear(self):
+        # Wert verwerfen, der nächste Zugriff lädt synchron neu
+        with self._lock:
+            self._value = None
+            self._loaded = False
+            self._expires_at = 0
+            self._generation += 1
+
+    def _refresh(self, generation):
+        try:
+            value = self.loader()
+            with self._lock:
+                # Ergebnis verwerfen, falls der Wert inzwischen ungültig gemacht wurde
+                if generation == self._generation:
+                    self._store(value)
+        except Exception:
+            # Bei Fehlern den alten Wert behalten und beim nächsten Zugriff erneut versuchen
+            traceback.print_exc()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _store(self, value):
+        self._value = value
+        self._loaded = True
+        self._expires_at = time.monotonic() + self.ttl
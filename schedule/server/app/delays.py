@@ -0,0 +1,74 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import RideExecution, execution_employee
+from app.intervals import stopplan_durations, occupancy
+
+
+def ride_resources(ride, crews):
+    # Zug und Mitarbeiter einer Fahrt als gemeinsame Ressourcen; Fahrten ohne Zug teilen keinen
+    train = [('train', ride.trainID)] if ride.trainID is not None else []
+    return train + [('employee', ssn) for ssn in crews.get(ride.id, ())]
+
+
+def reported_delay(ride):
+    # Direkt gemeldete Verspätung ohne Folgeverspätungen; ältere Fahrten ohne Angabe zählen voll
+    return ride.reportedDelay if ride.reportedDelay is not None else (ride.delay or 0)
+
+
+def propagate_delay(source, turnaround_buffer):
+    # Folgeverspätungen der Fahrten desselben Tages neu berechnen, die über Zug oder Personal (auch über
+    # Zwischenfahrten) an der Quelle hängen; jede dieser Fahrten bekommt das Maximum aus ihrer gemeldeten
+    # Verspätung und der durch ihre Vorgängerfahrten erzwungenen, sodass eine verringerte oder
+    # aufgehobene Verspätung auch die dadurch verursachten Folgeverspätungen wieder zurücknimmt
+    rides = RideExecution.query.filter(
+        RideExecution.date == source.date,
+        db.or_(RideExecution.isCanceled.is_(None), RideExecution.isCanceled == False)
+    ).order_by(RideExecution.time, RideExecution.id).all()
+
+    # Personal aller Fahrten des Tages (und der ggf. stornierten Quelle) mit einer Abfrage laden
+    crews = defaultdict(list)
+    for execution_id, ssn in db.session.query(
+            execution_employee.c.execution_id, execution_employee.c.employee_ssn
+    ).filter(execution_employee.c.execution_id.in_([ride.id for ride in rides] + [source.id])):
+        crews[execution_id].append(ssn)
+
+    durations = stopplan_durations()
+
+    def actual_end(ride, delay):
+        start = datetime.combine(ride.date, ride.time) + timedelta(minutes=delay or 0)
+        return occupancy(start, durations.get(ride.stopplanID))[1]
+
+    # Ab wann jede Ressource nach den bisher betrachteten Fahrten frühestens wieder verfügbar ist,
+    # und welche Ressourcen von der Quelle abhängen
+    available_from = {}
+    affected = set(ride_resources(source, crews))
+
+    updates = []
+    source_start = (source.time, source.id)
+    for ride in rides:
+        resources = ride_resources(ride, crews)
+        delay = ride.delay or 0
+        if (ride.time, ride.id) > source_start and affected.intersection(resources):
+            # Fahrt kann erst nach Ende der Vorgängerfahrten plus Wendezeit starten
+            planned_start = datetime.combine(ride.date, ride.time)
+            previous = [available_from[resource] for resource in resources if resource in available_from]
+            required_delay = 0
+            if previous:
+                ready = max(previous) + turnaround_buffer
+                required_delay = max(0, int((ready - planned_start).total_seconds() // 60))
+            delay = max(reported_delay(ride), required_delay)
+            if delay != (ride.delay or 0):
+                updates.append({'id': ride.id, 'delay': delay, 'reportedDelay': reported_delay(ride)})
+            affected.update(resources)
+
+        # Belegung dieser Fahrt an alle ihre Ressourcen weitergeben
+        end = actual_end(ride, delay)
+        for resource in resources:
+            available_from[resource] = max(available_from.get(resource, end), end)
+
+    # Alle Folgeverspätungen gesammelt in einem executemany-UPDATE schreiben
+    if updates:
+        db.session.execute(db.update(RideExecution), updates)
+    return [{'id': update['id'], 'delay': update['delay']} for update in updates]
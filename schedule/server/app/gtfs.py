@@ -0,0 +1,208 @@
+import csv
+import io
+import zipfile
+from collections import namedtuple
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from app import db
+from app.models import RideExecution, Stopplan, TrainStation
+from app.journeys import stopplan_station_offsets
+from app.recurrence import LOCAL_TIMEZONE
+
+AGENCY_ID = 'schedule'
+ROUTE_TYPE_RAIL = 2
+GTFS_BATCH_SIZE = 1000
+
+CALENDAR_DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Service und Fahrt einer Gruppe gleichartiger Fahrtdurchführungen; calendar ist (Wochentage, Start, Ende)
+# oder None, exceptions sind (Datum, exception_type) für calendar_dates.txt
+RideService = namedtuple('RideService', 'id stopplan_id train_id departure calendar exceptions')
+
+
+class _ZipStream:
+    # Nicht spulbares Ziel für ZipFile; geschriebene Bytes werden blockweise abgeholt
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        # Bisher geschriebene Bytes als einen Block liefern (nichts, falls leer)
+        data = b''.join(self._chunks)
+        self._chunks = []
+        if data:
+            yield data
+
+
+def gtfs_date(value):
+    return value.strftime('%Y%m%d')
+
+
+def gtfs_time(minutes):
+    # GTFS erlaubt Stunden über 24 für Fahrten, die nach Mitternacht enden
+    return f'{minutes // 60:02d}:{minutes % 60:02d}:00'
+
+
+def minute_of_day(value):
+    return value.hour * 60 + value.minute
+
+
+def stop_time_rows(trip_id, departure, stops):
+    # Ankunft und Abfahrt je Halt aus der Abfahrtszeit und der Fahrzeit ab dem ersten Halt
+    for sequence, (station_id, offset) in enumerate(stops, start=1):
+        time = gtfs_time(departure + offset)
+        yield [trip_id, time, time, station_id, sequence]
+
+
+def located_stations():
+    # Bahnhöfe mit gespeicherter Lage; Bahnhöfe ohne Lage werden nicht veröffentlicht, statt Koordinaten zu erfinden
+    return {station_id: (latitude, longitude) for station_id, latitude, longitude in db.session.query(
+        TrainStation.id, TrainStation.latitude, TrainStation.longitude
+    ).filter(TrainStation.latitude.isnot(None), TrainStation.longitude.isnot(None))}
+
+
+def stations_without_coordinates():
+    # Namen der Bahnhöfe, die im Feed fehlen, bis ihre Lage erfasst ist
+    return [name for name, in db.session.query(TrainStation.name).filter(
+        db.or_(TrainStation.latitude.is_(None), TrainStation.longitude.is_(None))
+    ).order_by(TrainStation.name)]
+
+
+def located_stops(coordinates):
+    # Halte je Stopplan ohne Bahnhöfe unbekannter Lage; Fahrzeiten bleiben auf den ersten Halt des Stopplans
+    # bezogen, Stoppläne mit weniger als zwei verbleibenden Halten entfallen
+    stops = {}
+    for stopplan_id, plan in stopplan_station_offsets().items():
+        located = [(station_id, offset) for station_id, offset in plan if station_id in coordinates]
+        if len(located) >= 2:
+            stops[stopplan_id] = located
+    return stops
+
+
+def active_ride_executions(stopplan_ids):
+    # Sortiert nach Fahrtgruppe, damit gleichartige Fahrten aufeinander folgen
+    return db.session.query(
+        RideExecution.id, RideExecution.stopplanID, RideExecution.trainID, RideExecution.batchID,
+        RideExecution.time, RideExecution.date
+    ).filter(
+        RideExecution.stopplanID.in_(stopplan_ids),
+        db.or_(RideExecution.isCanceled.is_(None), RideExecution.isCanceled == False)
+    ).order_by(RideExecution.stopplanID, RideExecution.trainID, RideExecution.batchID, RideExecution.time,
+               RideExecution.date, RideExecution.id)
+
+
+def service_from_dates(service_id, stopplan_id, train_id, departure, dates):
+    # Verkehrstage einer Fahrtgruppe als Wochentagsmuster von erstem bis letztem Tag, abweichende Tage als
+    # Ausnahmen; liegen die Tage zu verstreut, nur als einzelne calendar_dates-Einträge
+    weekdays = {date.isoweekday() for date in dates}
+    start_date, end_date = dates[0], dates[-1]
+    pattern = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)
+               if (start_date + timedelta(days=offset)).isoweekday() in weekdays]
+    removed = sorted(set(pattern) - set(dates))
+    if 1 + len(removed) <= len(dates):
+        calendar = (weekdays, start_date, end_date)
+        exceptions = [(date, 2) for date in removed]
+    else:
+        calendar = None
+        exceptions = [(date, 1) for date in dates]
+    return RideService(service_id, stopplan_id, train_id, departure, calendar, exceptions)
+
+
+def ride_services(stopplan_ids):
+    # Fahrten derselben Anlage (batchID) mit gleichem Stopplan, Zug und gleicher Abfahrtszeit werden eine
+    # Fahrt mit einem Service statt einer Fahrt pro Tag; mehrfache Fahrten am selben Tag bekommen eigene
+    rows = active_ride_executions(stopplan_ids).yield_per(GTFS_BATCH_SIZE)
+    for (stopplan_id, train_id, _, departure), group in groupby(rows, key=lambda row: row[1:5]):
+        dates = []
+        extras = []
+        for ride_id, *_, ride_date in group:
+            if dates and dates[-1][1] == ride_date:
+                extras.append((ride_id, ride_date))
+            else:
+                dates.append((ride_id, ride_date))
+        yield service_from_dates(f'R{dates[0][0]}', stopplan_id, train_id, departure, [date for _, date in dates])
+        for ride_id, ride_date in extras:
+            yield service_from_dates(f'R{ride_id}', stopplan_id, train_id, departure, [ride_date])
+
+
+def gtfs_tables(agency_name, agency_url):
+    # Je Datei Kopfzeile und Zeilen-Generator; Fahrten werden erst beim Schreiben gelesen
+    coordinates = located_stations()
+    stops = located_stops(coordinates)
+    stopplan_ids = list(stops)
+
+    def agency():
+        yield [AGENCY_ID, agency_name, agency_url, LOCAL_TIMEZONE.key]
+
+    def stations():
+        for station in TrainStation.query.filter(
+                TrainStation.latitude.isnot(None), TrainStation.longitude.isnot(None)
+        ).order_by(TrainStation.id).yield_per(GTFS_BATCH_SIZE):
+            yield [station.id, station.name, station.address, f'{station.latitude:.6f}', f'{station.longitude:.6f}']
+
+    def routes():
+        for stopplan in Stopplan.query.filter(Stopplan.id.in_(stopplan_ids)).order_by(Stopplan.id):
+            yield [stopplan.id, AGENCY_ID, stopplan.name, ROUTE_TYPE_RAIL]
+
+    def calendar():
+        for service in ride_services(stopplan_ids):
+            if service.calendar:
+                weekdays, start_date, end_date = service.calendar
+                yield [service.id] + [int(day in weekdays) for day in range(1, 8)] + \
+                    [gtfs_date(start_date), gtfs_date(end_date)]
+
+    def calendar_dates():
+        for service in ride_services(stopplan_ids):
+            for date, exception_type in service.exceptions:
+                yield [service.id, gtfs_date(date), exception_type]
+
+    def trips():
+        for service in ride_services(stopplan_ids):
+            yield [service.stopplan_id, service.id, service.id,
+                   f'Zug {service.train_id}' if service.train_id is not None else '']
+
+    def stop_times():
+        for service in ride_services(stopplan_ids):
+            yield from stop_time_rows(service.id, minute_of_day(service.departure), stops[service.stopplan_id])
+
+    return [
+        ('agency.txt', ['agency_id', 'agency_name', 'agency_url', 'agency_timezone'], agency()),
+        ('stops.txt', ['stop_id', 'stop_name', 'stop_desc', 'stop_lat', 'stop_lon'], stations()),
+        ('routes.txt', ['route_id', 'agency_id', 'route_short_name', 'route_type'], routes()),
+        ('calendar.txt', ['service_id'] + CALENDAR_DAYS + ['start_date', 'end_date'], calendar()),
+        ('calendar_dates.txt', ['service_id', 'date', 'exception_type'], calendar_dates()),
+        ('trips.txt', ['route_id', 'service_id', 'trip_id', 'trip_short_name'], trips()),
+        ('stop_times.txt', ['trip_id', 'arrival_time', 'departure_time', 'stop_id', 'stop_sequence'], stop_times()),
+    ]
+
+
+def generate_gtfs_zip(agency_name, agency_url, batch_size=GTFS_BATCH_SIZE):
+    # GTFS-Feed als Zip blockweise erzeugen, ohne den ganzen Fahrplan im Speicher zu halten
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, header, rows in gtfs_tables(agency_name, agency_url):
+            with io.TextIOWrapper(archive.open(name, 'w'), encoding='utf-8', newline='') as text:
+                writer = csv.writer(text)
+                writer.writerow(header)
+                batch = []
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        writer.writerows(batch)
+                        batch = []
+                        text.flush()
+                        yield from stream.drain()
+                writer.writerows(batch)
+            yield from stream.drain()
+    yield from stream.drain()
+
+
+def gtfs_filename():
+    return f'gtfs_{datetime.now().strftime("%Y%m%d")}.zip'
@@ -0,0 +1,277 @@
+import csv
+import io
+import uuid
+import zipfile
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from app import db
+from app.models import Stopplan, TrainStation, RideExecution, Section, track_section, trainStation_stopplan
+from app.bulk import chunked, BATCH_SIZE
+from app.track_sync import refresh_min_prices
+from app.analytics import apply_summary_deltas
+from app.gtfs import CALENDAR_DAYS
+from app.recurrence import date_array
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def read_csv(archive, name):
+    # Datei zeilenweise aus dem Zip lesen, ohne sie ganz zu entpacken
+    if name not in archive.namelist():
+        return
+    with io.TextIOWrapper(archive.open(name), encoding='utf-8-sig', newline='') as text:
+        yield from csv.DictReader(text)
+
+
+def parse_gtfs_date(value):
+    return datetime.strptime(value.strip(), '%Y%m%d').date()
+
+
+def parse_gtfs_time(value):
+    # Minuten ab Mitternacht des Betriebstags, GTFS erlaubt Werte über 24:00:00
+    hours, minutes, _ = (int(part) for part in value.strip().split(':'))
+    return hours * 60 + minutes
+
+
+def insert_returning_ids(table, rows, batch_size=BATCH_SIZE):
+    # Zeilen blockweise einfügen und die neuen IDs in Eingabereihenfolge zurückgeben
+    statement = table.insert().returning(table.c.id, sort_by_parameter_order=True)
+    ids = []
+    for chunk in chunked(rows, batch_size):
+        ids.extend(db.session.execute(statement, chunk).scalars())
+    return ids
+
+
+def parse_coordinates(row):
+    # stop_lat/stop_lon als Zahlen, fehlende oder leere Angaben als None
+    if not (row.get('stop_lat') or '').strip() or not (row.get('stop_lon') or '').strip():
+        return None, None
+    return float(row['stop_lat']), float(row['stop_lon'])
+
+
+def import_stations(archive):
+    # GTFS-Haltestellen über den Namen bestehenden Bahnhöfen zuordnen, fehlende anlegen;
+    # Bahnsteige (stops mit parent_station) zählen zum übergeordneten Bahnhof
+    stations = {}
+    missing_coordinates = set()
+    for station_id, name, latitude in db.session.query(TrainStation.id, TrainStation.name, TrainStation.latitude):
+        stations[name] = station_id
+        if latitude is None:
+            missing_coordinates.add(station_id)
+    stop_names = {}
+    parents = {}
+    for row in read_csv(archive, 'stops.txt'):
+        if row.get('parent_station'):
+            parents[row['stop_id']] = row['parent_station']
+        else:
+            stop_names[row['stop_id']] = (row['stop_name'], row.get('stop_desc') or '', *parse_coordinates(row))
+
+    new_stations = {}
+    for name, address, latitude, longitude in stop_names.values():
+        if name not in stations:
+            new_stations.setdefault(name, (address, latitude, longitude))
+    ids = insert_returning_ids(TrainStation.__table__, [
+        {'name': name, 'address': address, 'latitude': latitude, 'longitude': longitude}
+        for name, (address, latitude, longitude) in new_stations.items()
+    ])
+    stations.update(zip(new_stations, ids))
+
+    # Bestehenden Bahnhöfen ohne Lage die Koordinaten aus dem Feed übernehmen
+    located = {stations[name]: (latitude, longitude) for name, _, latitude, longitude in stop_names.values()
+               if latitude is not None and stations[name] in missing_coordinates}
+    if located:
+        db.session.execute(db.update(TrainStation), [
+            {'id': station_id, 'latitude': latitude, 'longitude': longitude}
+            for station_id, (latitude, longitude) in located.items()
+        ])
+
+    stop_stations = {stop_id: stations[name] for stop_id, (name, *_) in stop_names.items()}
+    for stop_id, parent_id in parents.items():
+        if parent_id in stop_stations:
+            stop_stations[stop_id] = stop_stations[parent_id]
+    return stop_stations, len(new_stations)
+
+
+def read_services(archive):
+    # calendar.txt als Wiederholungsregel, calendar_dates.txt als zusätzliche bzw. entfallende Tage
+    calendars = {}
+    for row in read_csv(archive, 'calendar.txt'):
+        weekdays = [day for day, name in enumerate(CALENDAR_DAYS, start=1) if row[name].strip() == '1']
+        calendars[row['service_id']] = (weekdays, parse_gtfs_date(row['start_date']), parse_gtfs_date(row['end_date']))
+
+    added = defaultdict(list)
+    removed = defaultdict(set)
+    for row in read_csv(archive, 'calendar_dates.txt'):
+        if row['exception_type'].strip() == '1':
+            added[row['service_id']].append(parse_gtfs_date(row['date']))
+        else:
+            removed[row['service_id']].add(parse_gtfs_date(row['date']))
+    return calendars, added, removed
+
+
+def read_trip_stops(archive, trips, stop_stations):
+    # stop_times.txt streamen: erste Abfahrt je Fahrt und angefahrene Bahnhöfe je Linie
+    first_departures = {}
+    route_stations = defaultdict(set)
+    for row in read_csv(archive, 'stop_times.txt'):
+        trip = trips.get(row['trip_id'])
+        station_id = stop_stations.get(row['stop_id'])
+        if trip is None or station_id is None:
+            continue
+        route_stations[trip[0]].add(station_id)
+
+        sequence = int(row['stop_sequence'])
+        departure = row.get('departure_time') or row.get('arrival_time')
+        if departure and (row['trip_id'] not in first_departures or sequence < first_departures[row['trip_id']][0]):
+            first_departures[row['trip_id']] = (sequence, parse_gtfs_time(departure))
+    return {trip_id: minutes for trip_id, (_, minutes) in first_departures.items()}, route_stations
+
+
+def track_stations():
+    # Bahnhöfe jeder lokal bekannten Strecke
+    stations = defaultdict(set)
+    for track_id, start_id, end_id in db.session.query(
+            track_section.c.track_id, Section.start_station_id, Section.end_station_id
+    ).join(Section, Section.id == track_section.c.section_id):
+        stations[track_id].update((start_id, end_id))
+    return stations
+
+
+def matching_track(stations, tracks, default_track_id):
+    # Kürzeste Strecke, die alle Bahnhöfe der Linie enthält, sonst die vorgegebene Strecke
+    candidates = [(len(track), track_id) for track_id, track in tracks.items() if stations <= track]
+    return min(candidates)[1] if candidates else default_track_id
+
+
+def import_stopplans(archive, route_stations, default_track_id):
+    # Eine Linie (route) wird ein Stopplan auf einer passenden Strecke; bestehende Stoppläne gleichen
+    # Namens auf derselben Strecke werden wiederverwendet, damit ein erneuter Import nichts verdoppelt
+    tracks = track_stations()
+    existing = {(name, track_id): stopplan_id for stopplan_id, name, track_id
+                in db.session.query(Stopplan.id, Stopplan.name, Stopplan.trackID)}
+    routes = []
+    for row in read_csv(archive, 'routes.txt'):
+        stations = route_stations.get(row['route_id'])
+        if not stations or len(stations) < 2:
+            continue
+        track_id = matching_track(stations, tracks, default_track_id)
+        if track_id is None:
+            continue
+        routes.append((row['route_id'], row.get('route_short_name') or row.get('route_long_name') or row['route_id'],
+                       track_id))
+
+    new_stopplans = list(dict.fromkeys((name, track_id) for _, name, track_id in routes
+                                       if (name, track_id) not in existing))
+    ids = insert_returning_ids(Stopplan.__table__, [{'name': name, 'trackID': track_id}
+                                                    for name, track_id in new_stopplans])
+    existing.update(zip(new_stopplans, ids))
+    stopplans = {route_id: existing[(name, track_id)] for route_id, name, track_id in routes}
+
+    # Nur noch fehlende Bahnhofszuordnungen ergänzen
+    linked = set(db.session.query(trainStation_stopplan.c.stopplan_id, trainStation_stopplan.c.trainStation_id).filter(
+        trainStation_stopplan.c.stopplan_id.in_(list(set(stopplans.values())))
+    ))
+    links = {(stopplan_id, station_id) for route_id, stopplan_id in stopplans.items()
+             for station_id in route_stations[route_id]} - linked
+    for chunk in chunked([{'trainStation_id': station_id, 'stopplan_id': stopplan_id}
+                          for stopplan_id, station_id in sorted(links)]):
+        db.session.execute(trainStation_stopplan.insert(), chunk)
+
+    refresh_min_prices({track_id for _, track_id in new_stopplans})
+    return stopplans, len(new_stopplans)
+
+
+def service_dates(calendars, added, removed):
+    # Verkehrstage je Service: Wochentage aus calendar.txt, ergänzt und bereinigt um calendar_dates.txt
+    dates = {}
+    for service_id in set(calendars) | set(added):
+        days = set(added.get(service_id, ()))
+        if service_id in calendars:
+            weekdays, start_date, end_date = calendars[service_id]
+            days.update(date_array({'dateIsOnce': False, 'startDate': start_date, 'endDate': end_date,
+                                    'weekdays': weekdays}).tolist())
+        dates[service_id] = sorted(days - removed.get(service_id, set()))
+    return dates
+
+
+def minute_time(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+def existing_rides(keys):
+    # Bereits vorhandene Fahrten unter den Schlüsseln (stopplanID, Datum, Uhrzeit), um sie beim Import zu überspringen
+    return set(db.session.query(RideExecution.stopplanID, RideExecution.date, RideExecution.time).filter(
+        db.tuple_(RideExecution.stopplanID, RideExecution.date, RideExecution.time).in_(keys)
+    ))
+
+
+def expand_rides(trips, first_departures, stopplans, dates):
+    # Jede Fahrt an jedem Verkehrstag ihres Service als (stopplanID, Datum, Uhrzeit, Fahrzeug), erst beim
+    # Einfügen blockweise erzeugt; Abfahrten nach Mitternacht zählen zum Folgetag
+    for trip_id, (route_id, service_id, vehicle) in trips.items():
+        stopplan_id = stopplans.get(route_id)
+        if stopplan_id is None or trip_id not in first_departures:
+            continue
+        day_shift, minutes = divmod(first_departures[trip_id], MINUTES_PER_DAY)
+        shift = timedelta(days=day_shift)
+        departure = minute_time(minutes)
+        for date in dates.get(service_id, ()):
+            yield stopplan_id, date + shift, departure, vehicle
+
+
+def import_gtfs(source, train_ids=None, default_track_id=None, batch_size=BATCH_SIZE):
+    # GTFS-Feed (Pfad oder Datei-Objekt eines Zips) in Bahnhöfe, Stoppläne und Fahrten übernehmen;
+    # alles in einer Transaktion, damit ein fehlerhafter Feed nichts halb importiert zurücklässt.
+    # train_ids ordnet Fahrzeugen des Feeds (block_id, ohne Umlauf die trip_id) Züge der Flotte zu;
+    # Fahrten ohne zugeordnetes Fahrzeug bekommen keinen Zug und blockieren so keinen
+    train_ids = train_ids or {}
+    try:
+        with zipfile.ZipFile(source) as archive:
+            stop_stations, created_stations = import_stations(archive)
+
+            trips = {row['trip_id']: (row['route_id'], row['service_id'], row.get('block_id') or row['trip_id'])
+                     for row in read_csv(archive, 'trips.txt')}
+            dates = service_dates(*read_services(archive))
+            first_departures, route_stations = read_trip_stops(archive, trips, stop_stations)
+            stopplans, created_stopplans = import_stopplans(archive, route_stations, default_track_id)
+
+        prices = dict(db.session.query(Stopplan.id, Stopplan.minPrice).filter(
+            Stopplan.id.in_(list(set(stopplans.values())))
+        ))
+
+        # Fahrten blockweise erzeugen, gegen den Bestand (inkl. bereits eingefügter Blöcke) abgleichen und
+        # einfügen; Umsatzsummen in derselben Transaktion nachführen
+        batch_id = uuid.uuid4().hex
+        created = skipped = unassigned = 0
+        for chunk in chunked(expand_rides(trips, first_departures, stopplans, dates), batch_size):
+            vehicles = {}
+            for stopplan_id, date, departure, vehicle in chunk:
+                vehicles.setdefault((stopplan_id, date, departure), vehicle)
+            known = existing_rides(list(vehicles))
+            skipped += len(known)
+
+            ride_rows = [{'date': date, 'time': departure, 'price': prices.get(stopplan_id), 'isCanceled': False,
+                          'delay': 0, 'stopplanID': stopplan_id, 'trainID': train_ids.get(vehicle),
+                          'batchID': batch_id}
+                         for (stopplan_id, date, departure), vehicle in vehicles.items()
+                         if (stopplan_id, date, departure) not in known]
+            if ride_rows:
+                db.session.execute(RideExecution.__table__.insert(), ride_rows)
+                apply_summary_deltas([(row['stopplanID'], row['date'], 1, row['price']) for row in ride_rows])
+            created += len(ride_rows)
+            unassigned += sum(row['trainID'] is None for row in ride_rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'createdStations': created_stations,
+        'stopplans': len(set(stopplans.values())),
+        'createdStopplans': created_stopplans,
+        'rideExecutions': created,
+        'rideExecutionsWithoutTrain': unassigned,
+        'skippedRideExecutions': skipped,
+        'batchID': batch_id if created else None
+    }
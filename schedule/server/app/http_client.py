@@ -0,0 +1,90 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app import app
+
+
+class CircuitOpenError(Exception):
+    # Wird geworfen, solange ein Dienst nach wiederholten Fehlern gesperrt ist
+    pass
+
+
+class CircuitBreaker:
+    # Sperrt Aufrufe nach zu vielen Fehlern und lässt nach einer Wartezeit einen Testaufruf zu
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            # Halb offen: nach Ablauf der Wartezeit einen einzelnen Versuch erlauben
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class ServiceClient:
+    # Gemeinsame Session mit Verbindungspool, Timeouts, Wiederholungen und Circuit Breaker pro Dienst
+
+    def __init__(self, name, base_url, connect_timeout, read_timeout, retries=2, pool_size=10):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = CircuitBreaker()
+
+        # Wiederholungen mit exponentiellem Backoff nur für idempotente Anfragen
+        retry = Retry(total=retries, backoff_factor=0.2, status_forcelist=[502, 503, 504],
+                      allowed_methods=['GET', 'HEAD'], raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, path, **kwargs):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f'{self.name}-Service ist vorübergehend nicht erreichbar')
+
+        kwargs.setdefault('timeout', self.timeout)
+        try:
+            response = self.session.request(method, self.base_url + path, **kwargs)
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise
+
+        # Nur Serverfehler zählen als Ausfall, 4xx sind reguläre Antworten
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+
+track_service = ServiceClient('Track', app.config['TRACK_SERVICE_URL'],
+                              app.config['SERVICE_CONNECT_TIMEOUT'], app.config['SERVICE_READ_TIMEOUT'])
+fleet_service = ServiceClient('Fleet', app.config['FLEET_SERVICE_URL'],
+                              app.config['SERVICE_CONNECT_TIMEOUT'], app.config['SERVICE_READ_TIMEOUT'])
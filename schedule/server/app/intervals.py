@@ -0,0 +1,129 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app import db
+from app.models import RideExecution, Stopplan, Track, Section, track_section, execution_employee
+
+# Auch Fahrten ohne bekannte Dauer belegen den Zug mindestens eine Minute
+MIN_OCCUPANCY = timedelta(minutes=1)
+
+
+def stopplan_durations():
+    # Fahrtdauer je Stopplan aus Länge und Höchstgeschwindigkeit der Abschnitte seiner Strecke (km, km/h)
+    rows = db.session.query(Stopplan.id, db.func.sum(Section.length / Section.maxSpeed)).join(
+        Track, Track.id == Stopplan.trackID
+    ).join(
+        track_section, track_section.c.track_id == Track.id
+    ).join(
+        Section, Section.id == track_section.c.section_id
+    ).group_by(Stopplan.id)
+    return {stopplan_id: timedelta(minutes=math.ceil((hours or 0) * 60)) for stopplan_id, hours in rows}
+
+
+def occupancy(start, duration):
+    # Halboffenes Belegungsintervall [Start, Ende)
+    return start, start + max(duration or timedelta(), MIN_OCCUPANCY)
+
+
+def duration_minutes(duration):
+    # Belegungsdauer als timedelta64[m], mindestens MIN_OCCUPANCY
+    return np.timedelta64(int(max(duration or timedelta(), MIN_OCCUPANCY).total_seconds() // 60), 'm')
+
+
+def slot_intervals(slots, duration):
+    # Belegungsintervalle aller angefragten Zeitpunkte (datetime64[m]-Array) als Arrays von Start und Ende
+    slots = np.asarray(slots, dtype='datetime64[m]')
+    return slots, slots + duration_minutes(duration)
+
+
+def batch_overlap_mask(slots, duration):
+    # Zeitpunkte einer Anfrage, deren Fahrt noch vor dem Ende der vorherigen beginnt; die Slots sind
+    # aufsteigend sortiert und gleich lang, daher genügt der Vergleich mit dem jeweiligen Vorgänger
+    slots = np.asarray(slots, dtype='datetime64[m]')
+    mask = np.zeros(slots.shape, dtype=bool)
+    mask[1:] = slots[1:] < slots[:-1] + duration_minutes(duration)
+    return mask
+
+
+class IntervalIndex:
+    # Pro Schlüssel (Zug oder Mitarbeiter) nach Start sortierte Intervalle mit laufendem Maximum
+    # der Enden für Überschneidungen in O(log n), für ganze Arrays von Anfragen auf einmal
+
+    def __init__(self, intervals, durations=None):
+        self.durations = durations or {}
+        grouped = defaultdict(list)
+        for key, start, end in intervals:
+            grouped[key].append((start, end))
+
+        self._starts = {}
+        self._max_ends = {}
+        for key, items in grouped.items():
+            items.sort()
+            self._starts[key] = np.array([start for start, _ in items], dtype='datetime64[m]')
+            self._max_ends[key] = np.maximum.accumulate(np.array([end for _, end in items], dtype='datetime64[m]'))
+
+    def overlap_mask(self, key, starts, ends):
+        # Alle Intervalle mit Beginn vor 'end' liegen links von index; eines davon überschneidet,
+        # wenn das größte Ende darunter nach 'start' liegt
+        starts = np.asarray(starts, dtype='datetime64[m]')
+        key_starts = self._starts.get(key)
+        if key_starts is None:
+            return np.zeros(starts.shape, dtype=bool)
+        index = np.searchsorted(key_starts, np.asarray(ends, dtype='datetime64[m]'), side='left')
+        return (index > 0) & (self._max_ends[key][np.maximum(index - 1, 0)] > starts)
+
+    def busy(self, starts, ends, keys=None):
+        # Alle (bzw. die angegebenen) Schlüssel, die in mindestens einem der Intervalle bereits belegt sind
+        keys = self._starts if keys is None else keys
+        return {key for key in keys if self.overlap_mask(key, starts, ends).any()}
+
+    def conflicts(self, key, slots, duration):
+        # Maske der angefragten Zeitpunkte, zu denen der Schlüssel bereits belegt ist
+        return self.overlap_mask(key, *slot_intervals(slots, duration))
+
+
+def load_occupancy(query, durations):
+    # Zeilen (Schlüssel, stopplanID, date, time, delay) in Belegungsintervalle umwandeln
+    for key, stopplan_id, date, time, delay in query:
+        start = datetime.combine(date, time) + timedelta(minutes=delay or 0)
+        yield (key, *occupancy(start, durations.get(stopplan_id)))
+
+
+def active_rides_between(query, first_date, last_date, durations):
+    # Nicht stornierte Fahrten des Zeitraums, inkl. Fahrten der Vortage, die noch andauern können
+    lookback = max(durations.values(), default=timedelta()) + timedelta(days=1)
+    return query.filter(
+        RideExecution.date.between(first_date - timedelta(days=lookback.days), last_date),
+        db.or_(RideExecution.isCanceled.is_(None), RideExecution.isCanceled == False)
+    )
+
+
+def build_train_index(first_date, last_date, train_ids=None):
+    # Belegung der Züge im Zeitraum; importierte Fahrten ohne Zug belegen keinen
+    durations = stopplan_durations()
+    query = active_rides_between(db.session.query(
+        RideExecution.trainID, RideExecution.stopplanID, RideExecution.date, RideExecution.time, RideExecution.delay
+    ), first_date, last_date, durations).filter(RideExecution.trainID.isnot(None))
+    if train_ids is not None:
+        query = query.filter(RideExecution.trainID.in_(train_ids))
+
+    return IntervalIndex(load_occupancy(query, durations), durations)
+
+
+def build_crew_index(first_date, last_date, employee_ssns):
+    # Belegung der Mitarbeiter über execution_employee in einer Abfrage
+    durations = stopplan_durations()
+    query = active_rides_between(db.session.query(
+        execution_employee.c.employee_ssn, RideExecution.stopplanID, RideExecution.date, RideExecution.time,
+        RideExecution.delay
+    ).join(
+        RideExecution, RideExecution.id == execution_employee.c.execution_id
+    ), first_date, last_date, durations).filter(execution_employee.c.employee_ssn.in_(employee_ssns))
+
+    # employee_ssn ist als Integer deklariert, Employee.ssn als String: SQLite liefert numerische SSNs
+    # daher als int, die Schlüssel müssen aber den SSNs der Anfrage entsprechen
+    rows = ((str(ssn), *ride) for ssn, *ride in query)
+    return IntervalIndex(load_occupancy(rows, durations), durations)
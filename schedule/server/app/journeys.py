@@ -0,0 +1,197 @@
+import heapq
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import selectinload
+
+from app import db
+from app.models import RideExecution, Stopplan, Track
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_minutes(value):
+    # Zeitpunkt als ganze Minuten seit 1970 für kompakte Integer-Arrays
+    return int((value - EPOCH).total_seconds() // 60)
+
+
+def from_minutes(minutes):
+    return EPOCH + timedelta(minutes=minutes)
+
+
+def track_station_offsets(track):
+    # Bahnhöfe entlang der Strecke mit Fahrzeit (Minuten) ab dem Startbahnhof, None falls keine Kette
+    following = {section.start_station_id: section for section in track.sections}
+    starts = set(following) - {section.end_station_id for section in track.sections}
+    if len(starts) != 1:
+        return None
+
+    station = starts.pop()
+    offsets = {station: 0.0}
+    while station in following:
+        section = following[station]
+        if section.end_station_id in offsets:
+            return None  # Strecke ist ein Kreis
+        offsets[section.end_station_id] = offsets[station] + section.length / section.maxSpeed * 60
+        station = section.end_station_id
+    return offsets
+
+
+def stopplan_station_offsets(stopplan_ids=None):
+    # Geordnete Halte je Stopplan (bzw. nur der angegebenen) als Liste (Bahnhof, Minuten ab dem ersten Halt)
+    query = Stopplan.query.options(
+        selectinload(Stopplan.trainStations),
+        selectinload(Stopplan.track).selectinload(Track.sections)
+    )
+    if stopplan_ids is not None:
+        query = query.filter(Stopplan.id.in_(stopplan_ids))
+    stopplans = query.all()
+
+    result = {}
+    for stopplan in stopplans:
+        if not stopplan.track:
+            continue
+        offsets = track_station_offsets(stopplan.track)
+        if not offsets:
+            continue
+        stops = sorted((offsets[station.id], station.id) for station in stopplan.trainStations if station.id in offsets)
+        if len(stops) < 2:
+            continue
+        first = stops[0][0]
+        result[stopplan.id] = [(station_id, round(offset - first)) for offset, station_id in stops]
+    return result
+
+
+class DayConnections:
+    # Alle Verbindungen eines Tages als parallele, nach Abfahrt sortierte Integer-Arrays
+
+    def __init__(self, connections):
+        connections.sort()
+        self.departures = array('q', (connection[0] for connection in connections))
+        self.arrivals = array('q', (connection[1] for connection in connections))
+        self.from_stations = array('q', (connection[2] for connection in connections))
+        self.to_stations = array('q', (connection[3] for connection in connections))
+        self.rides = array('q', (connection[4] for connection in connections))
+
+    def __len__(self):
+        return len(self.departures)
+
+    def scan_from(self, departure):
+        # Verbindungen ab einem Zeitpunkt in Abfahrtsreihenfolge
+        for index in range(bisect_left(self.departures, departure), len(self.departures)):
+            yield (self.departures[index], self.arrivals[index], self.from_stations[index],
+                   self.to_stations[index], self.rides[index])
+
+
+def build_day_connections(date):
+    # Verbindungen eines Tages aus nicht stornierten Fahrten und den Halten ihres Stopplans
+    stops = stopplan_station_offsets()
+    rides = db.session.query(
+        RideExecution.id, RideExecution.stopplanID, RideExecution.date, RideExecution.time, RideExecution.delay
+    ).filter(
+        RideExecution.date == date,
+        RideExecution.stopplanID.in_(list(stops)),
+        db.or_(RideExecution.isCanceled.is_(None), RideExecution.isCanceled == False)
+    )
+
+    connections = []
+    for ride_id, stopplan_id, ride_date, ride_time, delay in rides:
+        start = to_minutes(datetime.combine(ride_date, ride_time)) + (delay or 0)
+        plan = stops[stopplan_id]
+        for (from_station, from_offset), (to_station, to_offset) in zip(plan, plan[1:]):
+            connections.append((start + from_offset, start + to_offset, from_station, to_station, ride_id))
+    return DayConnections(connections)
+
+
+def modified_time(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class ConnectionTimetable:
+    # Verbindungsarrays pro Tag; bei Änderungen werden nur die betroffenen Tage neu aufgebaut
+
+    def __init__(self):
+        self._days = {}
+        self._watched = {}
+        self._lock = threading.Lock()
+
+    def watch(self, path):
+        # Alle Tage verwerfen, sobald sich die Datei ändert, z.B. nach Änderungen durch andere Prozesse
+        with self._lock:
+            self._watched[path] = modified_time(path)
+
+    def day(self, date):
+        with self._lock:
+            for path, modified in self._watched.items():
+                if modified_time(path) != modified:
+                    self._watched[path] = modified_time(path)
+                    self._days.clear()
+            connections = self._days.get(date)
+        if connections is None:
+            connections = build_day_connections(date)
+            with self._lock:
+                self._days[date] = connections
+        return connections
+
+    def invalidate(self, dates=None):
+        # Ohne Datumsangabe (z.B. geänderte Stoppläne) alle Tage verwerfen
+        with self._lock:
+            if dates is None:
+                self._days.clear()
+            else:
+                for date in dates:
+                    self._days.pop(date, None)
+
+    def earliest_arrival(self, origin, destination, departure, min_transfer=0, days=2):
+        # Connection Scan Algorithm: Verbindungen einmal in Abfahrtsreihenfolge durchlaufen
+        start = to_minutes(departure)
+        # Vortag einbeziehen, da Fahrten über Mitternacht hinaus andauern können
+        scans = [self.day(departure.date() + timedelta(days=offset)).scan_from(start) for offset in range(-1, days)]
+
+        earliest = {origin: start}
+        # Je Bahnhof die Einstiegs- und die Ankunftsverbindung der Fahrt, mit der er am frühesten erreicht wird
+        reached_by = {}
+        # Je Fahrt die Verbindung, an der sie zuerst erreichbar war (Einstieg)
+        boarded_at = {}
+        for connection in heapq.merge(*scans):
+            dep, arr, from_station, to_station, ride_id = connection
+            if dep >= earliest.get(destination, float('inf')):
+                break
+
+            # Einsteigen, wenn man schon im Zug sitzt oder rechtzeitig (inkl. Umstiegszeit) am Bahnhof ist
+            ready = earliest.get(from_station)
+            if ride_id not in boarded_at:
+                if ready is None or ready + (min_transfer if from_station != origin else 0) > dep:
+                    continue
+                boarded_at[ride_id] = connection
+
+            if arr < earliest.get(to_station, float('inf')):
+                earliest[to_station] = arr
+                reached_by[to_station] = (boarded_at[ride_id], connection)
+
+        if destination not in reached_by:
+            return None
+        return journey_legs(reached_by, origin, destination)
+
+
+def journey_legs(reached_by, origin, destination):
+    # Vom Ziel rückwärts je Teilstrecke zum Einstiegsbahnhof der jeweiligen Fahrt springen; so bleibt
+    # eine durchgehende Fahrt eine Teilstrecke, auch wenn ein Zwischenhalt von einer anderen Fahrt stammt
+    legs = []
+    station = destination
+    while station != origin:
+        boarding, alighting = reached_by[station]
+        legs.append({'rideExecutionID': alighting[4], 'fromStationID': boarding[2], 'toStationID': alighting[3],
+                     'departure': from_minutes(boarding[0]), 'arrival': from_minutes(alighting[1])})
+        station = boarding[2]
+    legs.reverse()
+    return legs
+
+
+timetable = ConnectionTimetable()
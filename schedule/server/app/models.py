@@ -33,6 +33,8 @@ class TrainStation(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), nullable=False)
     address = db.Column(db.String(100), nullable=False)
+    latitude = db.Column(db.Float, nullable=True)  # WGS84, z.B. aus einem importierten GTFS-Feed
+    longitude = db.Column(db.Float, nullable=True)
 
     stopplans = db.relationship('Stopplan', secondary=trainStation_stopplan, back_populates='trainStations')
 
@@ -89,7 +91,9 @@ class Department(enum.Enum):
 execution_employee= db.Table('execution_employee',
     db.Column('id', db.Integer, primary_key=True),
     db.Column('execution_id', db.Integer, db.ForeignKey('rideExecutions.id')),
-    db.Column('employee_ssn', db.Integer, db.ForeignKey('employees.ssn'))
+    db.Column('employee_ssn', db.Integer, db.ForeignKey('employees.ssn')),
+    db.Index('ix_execution_employee_employee_ssn', 'employee_ssn', 'execution_id'),
+    db.Index('ix_execution_employee_execution_id', 'execution_id')
 )
 
 
@@ -110,14 +114,57 @@ class Employee(db.Model):
 
 class RideExecution(db.Model):
     __tablename__ = 'rideExecutions'
+    __table_args__ = (
+        db.Index('ix_rideExecutions_date_time_trainID', 'date', 'time', 'trainID'),
+        db.Index('ix_rideExecutions_stopplanID_date_time', 'stopplanID', 'date', 'time'),
+        db.Index('ix_rideExecutions_trainID_date_time', 'trainID', 'date', 'time'),
+        db.Index('ix_rideExecutions_batchID', 'batchID'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     price = db.Column(db.Float, nullable=True)
     isCanceled = db.Column(db.Boolean, nullable=True)
     delay = db.Column(db.Integer, nullable=True)
+    reportedDelay = db.Column(db.Integer, nullable=True)  # Direkt gemeldete Verspätung ohne Folgeverspätungen
     date = db.Column(db.Date, nullable=False)
     time = db.Column(db.Time, nullable=False)
-    trainID = db.Column(db.Integer, nullable=False)
+    trainID = db.Column(db.Integer, nullable=True)  # None: importierte Fahrt ohne zugeordnetes Fahrzeug
+    batchID = db.Column(db.String(32), nullable=True)  # Gemeinsame Kennung aller in einer Anfrage angelegten Fahrten
 
     stopplanID = db.Column(db.Integer, db.ForeignKey('stopplans.id'), nullable=False)
     stopplan = db.relationship('Stopplan', back_populates='rideExecutions')
-    employees = db.relationship('Employee', secondary=execution_employee, back_populates='rideExecutions')
\ No newline at end of file
+    employees = db.relationship('Employee', secondary=execution_employee, back_populates='rideExecutions')
+
+
+class RideDailySummary(db.Model):
+    # Laufend mitgeführte Summen nicht stornierter Fahrten je Stopplan und Tag
+    __tablename__ = 'rideDailySummaries'
+    __table_args__ = (
+        db.UniqueConstraint('stopplanID', 'date'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    rides = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    stopplanID = db.Column(db.Integer, db.ForeignKey('stopplans.id'), nullable=False)
+
+
+class RideMonthlySummary(db.Model):
+    # Wie RideDailySummary, je Stopplan und Monat (erster Tag des Monats)
+    __tablename__ = 'rideMonthlySummaries'
+    __table_args__ = (
+        db.UniqueConstraint('stopplanID', 'month'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Date, nullable=False)
+    rides = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    stopplanID = db.Column(db.Integer, db.ForeignKey('stopplans.id'), nullable=False)
+
+
+class ReplicationState(db.Model):
+    # Zuletzt übernommene Version eines Änderungsprotokolls, z.B. des Track-Service
+    __tablename__ = 'replicationStates'
+    source = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,55 @@
+import base64
+import heapq
+from datetime import datetime
+from itertools import islice
+
+from app import db
+from app.models import RideExecution
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(ride_execution):
+    # Position (Datum, Uhrzeit, ID) der letzten Fahrt als undurchsichtigen Cursor kodieren
+    key = f"{ride_execution.date.isoformat()}|{ride_execution.time.strftime('%H:%M:%S')}|{ride_execution.id}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor):
+    # Cursor wieder in (Datum, Uhrzeit, ID) zerlegen
+    try:
+        date, time, ride_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return (datetime.strptime(date, '%Y-%m-%d').date(),
+                datetime.strptime(time, '%H:%M:%S').time(),
+                int(ride_id))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Ungültiger Cursor')
+
+
+def after_cursor(query, cursor):
+    # Keyset-Bedingung (date, time, id) > Cursor, nutzt den Index statt OFFSET
+    date, time, ride_id = decode_cursor(cursor)
+    return query.filter(db.or_(
+        RideExecution.date > date,
+        db.and_(RideExecution.date == date, RideExecution.time > time),
+        db.and_(RideExecution.date == date, RideExecution.time == time, RideExecution.id > ride_id)
+    ))
+
+
+def ride_key(ride):
+    return ride.date, ride.time, ride.id
+
+
+def paginate_ride_executions(query, cursor=None, limit=DEFAULT_PAGE_SIZE, archived=None):
+    # Eine Seite Fahrten in der Reihenfolge (date, time, id) samt Cursor für die nächste Seite;
+    # 'archived' sind bereits nach dem Cursor gefilterte, geordnete Fahrten aus dem Archiv
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        query = after_cursor(query, cursor)
+
+    page = query.order_by(RideExecution.date, RideExecution.time, RideExecution.id).limit(limit + 1).all()
+    if archived is not None:
+        page = list(islice(heapq.merge(page, islice(archived, limit + 1), key=ride_key), limit + 1))
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+LOCAL_TIMEZONE = ZoneInfo('Europe/Berlin')
+
+
+def parse_local_datetime(value):
+    # UTC-Zeitstempel des Clients in lokale Zeit (ohne Sekunden) umrechnen
+    utc_time = datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=ZoneInfo("UTC"))
+    return utc_time.astimezone(LOCAL_TIMEZONE).replace(second=0, microsecond=0)
+
+
+def parse_recurrence(data):
+    # Wiederholungsregel aus den Anfragedaten auslesen
+    start_date = datetime.strptime(data['startDate'][:10], '%Y-%m-%d').date()
+    start_date += timedelta(days=1)  # Ein Tag hinzufügen
+
+    end_date = None
+    if data.get('endDate'):
+        end_date = datetime.strptime(data['endDate'][:10], '%Y-%m-%d').date()
+
+    end_time = None
+    if data.get('endTime'):
+        end_time = parse_local_datetime(data['endTime']).time()
+
+    return {
+        'dateIsOnce': bool(data['datumIsEinmalig']),
+        'timeIsOnce': bool(data['zeitIsEinmalig']),
+        'startDate': start_date,
+        'endDate': end_date,
+        'startTime': parse_local_datetime(data['startTime']).time(),
+        'endTime': end_time,
+        'weekdays': [day['value'] for day in data['selectedDays']] if data.get('selectedDays') else [],
+        'interval': data['zeitIntervall'] if data.get('zeitIntervall') else 0
+    }
+
+
+def date_array(recurrence):
+    # Alle Tage der Regel als datetime64[D], bei wiederkehrenden Daten per Wochentagsmaske gefiltert
+    if recurrence['dateIsOnce']:
+        return np.array([recurrence['startDate']], dtype='datetime64[D]')
+
+    if recurrence['endDate'] is None:
+        raise ValueError('Für wiederkehrende Fahrten wird ein Enddatum benötigt')
+
+    days = np.arange(np.datetime64(recurrence['startDate'], 'D'), np.datetime64(recurrence['endDate'], 'D') + 1)
+    # Der 01.01.1970 (Tag 0) war ein Donnerstag, ISO-Wochentag 4
+    weekdays = (days.astype('int64') + 3) % 7 + 1
+    return days[np.isin(weekdays, recurrence['weekdays'])]
+
+
+def minute_array(recurrence):
+    # Alle Abfahrtszeiten eines Tages als Minuten ab Mitternacht zwischen Start- und Endzeit im Zeitintervall
+    start = recurrence['startTime'].hour * 60 + recurrence['startTime'].minute
+    if recurrence['timeIsOnce']:
+        return np.array([start], dtype='int64')
+
+    if recurrence['endTime'] is None or recurrence['interval'] <= 0:
+        raise ValueError('Für wiederkehrende Zeiten werden Endzeit und Zeitintervall benötigt')
+
+    end = recurrence['endTime'].hour * 60 + recurrence['endTime'].minute
+    return np.arange(start, end + 1, recurrence['interval'], dtype='int64')
+
+
+def slot_array(recurrence):
+    # Kreuzprodukt aus Tagen und Zeiten in einem Schritt als nach Datum und Uhrzeit geordnetes datetime64[m]-Array
+    days = date_array(recurrence).astype('datetime64[m]')
+    minutes = minute_array(recurrence).astype('timedelta64[m]')
+    return (days[:, np.newaxis] + minutes[np.newaxis, :]).ravel()
+
+
+def slot_tuples(slots):
+    # datetime64[m]-Array in eine Liste von (Datum, Uhrzeit) umwandeln
+    return [(value.date(), value.time()) for value in slots.tolist()]
+
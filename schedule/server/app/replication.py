@@ -0,0 +1,90 @@
+import threading
+import traceback
+
+from app import app, db
+from app.http_client import track_service
+from app.journeys import timetable
+from app.models import ReplicationState
+from app.track_sync import apply_track_change, refresh_min_prices
+
+TRACK_SOURCE = 'track'
+CHANGES_PAGE_SIZE = 1000
+
+
+class TrackReplicator:
+    # Lokale Kopie der Streckendaten aus dem Änderungsprotokoll des Track-Service nachführen;
+    # jede Seite wird samt neuer Version in einer Transaktion übernommen
+
+    def __init__(self, client, on_change=None):
+        self.client = client
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def version(self):
+        state = db.session.get(ReplicationState, TRACK_SOURCE)
+        return state.version if state else 0
+
+    def sync(self):
+        # Alle Änderungen seit der gespeicherten Version abholen und der Reihe nach anwenden
+        with self._lock:
+            applied = 0
+            while True:
+                since = self.version()
+                response = self.client.get('/track/changes', params={'since': since, 'limit': CHANGES_PAGE_SIZE})
+                response.raise_for_status()
+                page = response.json()
+                if not page['changes']:
+                    break
+
+                try:
+                    affected_tracks = set()
+                    for change in page['changes']:
+                        affected_tracks |= apply_track_change(change)
+                    db.session.flush()
+                    refresh_min_prices(affected_tracks)
+
+                    state = db.session.get(ReplicationState, TRACK_SOURCE) or ReplicationState(source=TRACK_SOURCE)
+                    state.version = page['version']
+                    db.session.add(state)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+
+                applied += len(page['changes'])
+                if self.on_change:
+                    self.on_change()
+                if page['version'] >= page['latestVersion']:
+                    break
+            return applied
+
+    def notify(self):
+        # Vom Webhook aufgerufen: Hintergrund-Thread sofort synchronisieren lassen
+        self._wakeup.set()
+
+    def start(self, interval):
+        # Hintergrund-Thread, der alle `interval` Sekunden bzw. nach einem Webhook synchronisiert;
+        # wird beim ersten Request des bedienenden Prozesses gestartet, höchstens einmal je Prozess
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run, args=(interval,), daemon=True)
+            self._thread.start()
+
+    def run(self, interval):
+        # Synchronisationsschleife; läuft im Hintergrund-Thread oder als eigener Worker-Prozess
+        while True:
+            try:
+                with app.app_context():
+                    self.sync()
+            except Exception:
+                # Track-Service nicht erreichbar: lokale Kopie bleibt lesbar, nächster Versuch folgt
+                traceback.print_exc()
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+
+
+track_replicator = TrackReplicator(track_service, on_change=timetable.invalidate)
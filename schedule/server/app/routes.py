@@ -1,70 +1,122 @@
+import heapq
+import json
 import traceback
-from datetime import datetime, timedelta, time
-from zoneinfo import ZoneInfo
+import uuid
+import zipfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
 
-from flask import render_template, request, jsonify
+from flask import render_template, request, jsonify, Response, stream_with_context
+import click
 import requests
-
-from app.models import Stopplan, Track, TrainStation, RideExecution, Employee
+import numpy as np
+
+from app.models import Stopplan, Track, TrainStation, RideExecution, Employee, RideDailySummary, RideMonthlySummary, \
+    trainStation_stopplan, execution_employee
+from app.recurrence import parse_recurrence, slot_array, slot_tuples
+from app.bulk import bulk_create_ride_executions
+from app.pagination import paginate_ride_executions, decode_cursor, ride_key, DEFAULT_PAGE_SIZE
+from app.streaming import requested_stream_format, stream_query, stream_items, STREAM_BATCH_SIZE
+from app.cache import TTLCache
+from app.http_client import fleet_service, CircuitOpenError
+from app.intervals import build_train_index, build_crew_index, slot_intervals, batch_overlap_mask
+from app.track_sync import refresh_min_prices
+from app.delays import propagate_delay
+from app.journeys import timetable, stopplan_station_offsets
+from app.replication import track_replicator
+from app.webhooks import require_webhook_secret
+from app.gtfs import generate_gtfs_zip, gtfs_filename, stations_without_coordinates
+from app.gtfs_import import import_gtfs
+from app.archive import archive_rides, read_archived_rides, drop_segment, generation_path
+from app.analytics import add_rides, remove_rides, apply_summary_deltas, ride_totals, usage_fee_per_ride
 from app import app, db
 from flask_cors import CORS, cross_origin
+from sqlalchemy.orm import selectinload
 
 CORS(app)
 
+# archive-rides läuft als eigener Prozess; der Fahrplan-Zwischenspeicher erkennt Archivierungen an der Markerdatei
+timetable.watch(generation_path(app.config['RIDE_ARCHIVE_DIR']))
+
+
+@app.before_request
+def start_track_replication():
+    # Erst im bedienenden Prozess starten: der Reloader-Elternprozess beantwortet keine Requests,
+    # und unter `flask run` oder einem WSGI-Server gibt es kein __main__
+    if app.config['TRACK_REPLICATION_IN_PROCESS'] and app.config['TRACK_REPLICATION_INTERVAL'] > 0:
+        track_replicator.start(app.config['TRACK_REPLICATION_INTERVAL'])
+
+# Anzahl der Zeitpunkte, die eine Vorschau (dryRun) als Beispiel zurückgibt
+DRY_RUN_SAMPLE_SIZE = 20
+
 @app.route('/stopplans')
 def get_aLl_stopplans():
-    # Alle Stoppläne aus der Datenbank abrufen
-    stopplans = Stopplan.query.all()
-    stopplan_list = []  # Liste zum Speichern der Stoppläne
-
-    for stopplan in stopplans:
-        # Bahnhöfe des aktuellen Stopplans sammeln
-        trainStation_list = []
-        for trainStation in stopplan.trainStations:
-            trainStation_list.append({
-                'id': trainStation.id,
-                'name': trainStation.name,
-                'address': trainStation.address
-            })
-
-        # Fahrtausführungen des Stopplans sammeln
-        rideExecution_list = []
-        for ride_execution in stopplan.rideExecutions:
-            # Mitarbeiter der jeweiligen Fahrtausführung sammeln
-            employee_list = []
-            for employee in ride_execution.employees:
-                employee_list.append({
-                    'ssn': employee.ssn,
-                    'firstName': employee.firstName,
-                    'lastName': employee.lastName,
-                    'password': employee.password,  # Sicherheitsrisiko: Passwörter sollten nicht ausgegeben werden
-                    'department': employee.department.value,
-                    'role': employee.role.value,
-                    'username': employee.username
-                })
-            # Fahrtausführung zur Liste hinzufügen
-            rideExecution_list.append({
-                'id': ride_execution.id,
-                'price': ride_execution.price,
-                'isCanceled': ride_execution.isCanceled,
-                'delay': ride_execution.delay,
-                'date': ride_execution.date.strftime('%d.%m.%Y'),  # Datum formatieren
-                'time': ride_execution.time.strftime('%H:%M'),  # Zeit formatieren
-                'stopplanID': ride_execution.stopplanID,
-                'trainID': ride_execution.trainID,
-                'employees': employee_list
-            })
+    # Alle Stoppläne samt Bahnhöfen, Fahrten und Mitarbeitern mit einer festen Anzahl Abfragen laden
+    query = Stopplan.query.options(
+        selectinload(Stopplan.trainStations),
+        selectinload(Stopplan.rideExecutions).selectinload(RideExecution.employees)
+    )
+
+    # Auf Wunsch blockweise streamen statt die ganze Liste aufzubauen
+    stream_format = requested_stream_format()
+    if stream_format:
+        return stream_query(query.order_by(Stopplan.id), serialize_stopplan, stream_format)
+
+    stopplan_list = [serialize_stopplan(stopplan) for stopplan in query.all()]  # Liste zum Speichern der Stoppläne
+    return jsonify(stopplan_list)  # Liste als JSON zurückgeben
 
-        # Stopplan-Daten zur Liste hinzufügen
-        stopplan_list.append({
-            'id': stopplan.id,
-            'name': stopplan.name,
-            'minPrice': stopplan.minPrice,
-            'trackID': stopplan.trackID,
-            'trainStations': trainStation_list,
-            'rideExecutions': rideExecution_list
+
+def serialize_stopplan(stopplan):
+    # Bahnhöfe des aktuellen Stopplans sammeln
+    trainStation_list = []
+    for trainStation in stopplan.trainStations:
+        trainStation_list.append({
+            'id': trainStation.id,
+            'name': trainStation.name,
+            'address': trainStation.address
         })
-    return jsonify(stopplan_list)  # Liste als JSON zurückgeben
+
+    # Fahrtausführungen des Stopplans sammeln
+    rideExecution_list = [serialize_ride_execution(ride_execution) for ride_execution in stopplan.rideExecutions]
+
+    # Stopplan-Daten zusammenstellen
+    return {
+        'id': stopplan.id,
+        'name': stopplan.name,
+        'minPrice': stopplan.minPrice,
+        'trackID': stopplan.trackID,
+        'trainStations': trainStation_list,
+        'rideExecutions': rideExecution_list
+    }
+
+
+def serialize_ride_execution(ride_execution):
+    # Mitarbeiter der jeweiligen Fahrtausführung sammeln
+    employee_list = []
+    for employee in ride_execution.employees:
+        employee_list.append({
+            'ssn': employee.ssn,
+            'firstName': employee.firstName,
+            'lastName': employee.lastName,
+            'password': employee.password,  # Sicherheitsrisiko: Passwörter sollten nicht ausgegeben werden
+            'department': employee.department.value,
+            'role': employee.role.value,
+            'username': employee.username
+        })
+
+    # Die Fahrtdaten zusammenstellen
+    return {
+        'id': ride_execution.id,
+        'price': ride_execution.price,
+        'isCanceled': ride_execution.isCanceled,
+        'delay': ride_execution.delay,
+        'date': ride_execution.date.strftime('%d.%m.%Y'),  # Datum im Format dd.MM.yyyy
+        'time': ride_execution.time.strftime('%H:%M'),  # Uhrzeit im Format HH:mm
+        'stopplanID': ride_execution.stopplanID,
+        'trainID': ride_execution.trainID,
+        'batchID': ride_execution.batchID,
+        'employees': employee_list
+    }
 
 @app.route('/stopplan/<int:stopplan_id>')
 def get_stopplan(stopplan_id):
@@ -96,6 +148,7 @@ def deleteStopplan(stopplanID):
     stopplan = Stopplan.query.get_or_404(stopplanID)
     db.session.delete(stopplan)  # Stopplan aus der Datenbank entfernen
     db.session.commit()  # Änderungen speichern
+    timetable.invalidate()
     return jsonify({'message': 'Stopplan deleted'}), 200
 
 
@@ -109,26 +162,9 @@ def createStopplan():
         if not data.get('name') or not data.get('trackID'):
             return jsonify({'message': 'Fehlende Daten: name oder trackID'}), 400
 
-        # API-Endpoint aufrufen, um die Strecke anhand der trackID zu erhalten
-        response = requests.get(f'http://127.0.0.1:5001/track/tracks/{data["trackID"]}')
-
-        # Überprüfen, ob die Strecke gefunden wurde
-        if response.status_code != 200:
-            return jsonify({'message': 'Fehler beim Abrufen der Strecke'}), response.status_code
-
-        track = response.json()  # JSON-Daten der Strecke
-
-        # Mindestpreis basierend auf den Abschnitten der Strecke berechnen
-        minPrice = 0
-        for section in track['sections']:
-            # Abschnittsinformationen aus dem Dictionary extrahieren
-            sectionID = section['sectionID']
-            usageFee = section['usageFee']
-            print(f"Section ID: {sectionID}, usageFee: {usageFee}")
-            minPrice += usageFee
-
-        if len(track['sections']) > 0:
-            minPrice = minPrice / len(track['sections'])  # Durchschnitt der Gebühren berechnen
+        # Strecke aus der lokalen, per Änderungsprotokoll nachgeführten Kopie lesen
+        if not Track.query.get(data['trackID']):
+            return jsonify({'message': 'Track mit der angegebenen trackID existiert nicht'}), 404
 
         # Bahnhöfe aus den übergebenen Daten abrufen
         train_stations = []
@@ -141,14 +177,16 @@ def createStopplan():
         # Neuen Stopplan erstellen
         stopplan = Stopplan(
             name=data['name'],
-            minPrice=minPrice,
             trackID=data['trackID'],
             trainStations=train_stations
         )
 
-        # Stopplan in die Datenbank einfügen
+        # Stopplan in die Datenbank einfügen und Mindestpreis aus der lokalen Strecke setzen
         db.session.add(stopplan)
+        db.session.flush()
+        refresh_min_prices([stopplan.trackID])
         db.session.commit()
+        timetable.invalidate()
 
         # Erfolgreich erstellten Stopplan zurückgeben
         return jsonify({
@@ -161,6 +199,7 @@ def createStopplan():
         }), 201
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({'message': f'Fehler beim Erstellen des Stopplans: {str(e)}'}), 500
 
 
@@ -194,18 +233,14 @@ def update_stopplan(stopplan_id):
                     new_train_stations.append(station)
             stopplan.trainStations = new_train_stations
 
-        # Berechnung des Mindestpreises basierend auf den Track-Sektionen
-        minPrice = 0
-        for section in track.sections:
-            print(f"Section ID: {section.id}, usageFee: {section.usageFee}")
-            minPrice += section.usageFee
-        minPrice = minPrice / len(track.sections)
-
-        # Mindestpreis im Stopplan speichern
-        stopplan.minPrice = minPrice
+        # Mindestpreis nur bei geänderter Strecke neu berechnen
+        if 'trackID' in data:
+            db.session.flush()
+            refresh_min_prices([stopplan.trackID])
 
         # Änderungen in der Datenbank speichern
         db.session.commit()
+        timetable.invalidate()
 
         # Aktualisierten Stopplan zurückgeben
         return jsonify({
@@ -226,155 +261,109 @@ def create_ride_execution():
         # Daten aus der Anfrage lesen
         data = request.get_json()
 
-        # Liste der Mitarbeiter erstellen
-        employee_list = []
-        if 'employeeSSN_list' in data:
-            for employee_data in data['employeeSSN_list']:
-                employee = Employee.query.get(employee_data['ssn'])
-                if employee:
-                    employee_list.append(employee)
-                else:
-                    return jsonify({'message': f'Mitarbeiter mit SSN {employee_data["ssn"]} nicht gefunden'}), 400
-        else:
+        # Liste der Mitarbeiter mit einer Abfrage laden
+        if 'employeeSSN_list' not in data:
             return jsonify({'message': 'No employeeSSN_list found in data'}), 400
+        employee_ssns = list(dict.fromkeys(employee_data['ssn'] for employee_data in data['employeeSSN_list']))
+        employees = {employee.ssn: employee for employee in Employee.query.filter(Employee.ssn.in_(employee_ssns))}
+        for ssn in employee_ssns:
+            if ssn not in employees:
+                return jsonify({'message': f'Mitarbeiter mit SSN {ssn} nicht gefunden'}), 400
 
-        # Start- und Enddatum verarbeiten
+        # Zeitpunkte aus Datum, Wochentagen und Zeitintervall in einem Schritt als Array erzeugen
         try:
-            start_date_obj = datetime.strptime(data['startDate'][:10], '%Y-%m-%d').date()
-            start_date_obj += timedelta(days=1)  # Ein Tag hinzufügen
-        except ValueError:
-            return jsonify({'message': 'Ungültiges Startdatum. Format sollte YYYY-MM-DD sein.'}), 400
-        if data['endDate']:
-            end_date_obj = datetime.strptime(data['endDate'][:10], '%Y-%m-%d').date()
-
-        # Wochentage für wiederkehrende Fahrten
-        if data['selectedDays']:
-            selected_days = data['selectedDays']
-            weekdays = [day['value'] for day in selected_days]
-
-        # Zeitintervall verarbeiten
-        if data['zeitIntervall']:
-            zeitIntervall = data['zeitIntervall']
-
-        # Start- und Endzeit in lokale Zeit umrechnen
-        utc_time = datetime.strptime(data['startTime'], '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=ZoneInfo("UTC"))
-        local_timezone = ZoneInfo('Europe/Berlin')
-        local_start_datetime = utc_time.astimezone(local_timezone).replace(second=0, microsecond=0)
-        if data['endTime']:
-            utc_time2 = datetime.strptime(data['endTime'], '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=ZoneInfo("UTC"))
-            local_end_datetime = utc_time2.astimezone(local_timezone).replace(second=0, microsecond=0)
-
-        # Listen für Fahrtdurchführungen erstellen
-        current_date = start_date_obj
-        rideExecution_list = []
-
-        # Szenarien basierend auf Einmaligkeit von Datum und Zeit
-        if data['datumIsEinmalig'] == True and data['zeitIsEinmalig'] == True:
-            # Einmalige Fahrt erstellen
-            ride_execution = RideExecution(
-                price=data['price'],
-                isCanceled=False,
-                delay=0,
-                date=start_date_obj,
-                time=local_start_datetime.time(),
-                stopplanID=data['stopplanID'],
-                trainID=data['trainID'],
-                employees=employee_list
-            )
-            db.session.add(ride_execution)
-            rideExecution_list.append(ride_execution)
-            db.session.commit()
-
-        elif data['datumIsEinmalig'] == True and data['zeitIsEinmalig'] == False:
-            # Mehrere Fahrten an einem Tag erstellen
-            current_time = datetime.combine(start_date_obj, local_start_datetime.time())
-            end_time = datetime.combine(start_date_obj, local_end_datetime.time())
-
-            while current_time <= end_time:
-                ride_execution = RideExecution(
-                    price=data['price'],
-                    isCanceled=False,
-                    delay=0,
-                    date=start_date_obj,
-                    time=current_time.time(),
-                    stopplanID=data['stopplanID'],
-                    trainID=data['trainID'],
-                    employees=employee_list
-                )
-                db.session.add(ride_execution)
-                rideExecution_list.append(ride_execution)
-                current_time += timedelta(minutes=zeitIntervall)
-            db.session.commit()
-
-        elif data['datumIsEinmalig'] == False and data['zeitIsEinmalig'] == True:
-            # Mehrere Tage mit einer Zeit erstellen
-            while current_date <= end_date_obj:
-                if current_date.isoweekday() in weekdays:
-                    ride_execution = RideExecution(
-                        price=data['price'],
-                        isCanceled=False,
-                        delay=0,
-                        date=current_date,
-                        time=local_start_datetime.time(),
-                        stopplanID=data['stopplanID'],
-                        trainID=data['trainID'],
-                        employees=employee_list
-                    )
-                    db.session.add(ride_execution)
-                    rideExecution_list.append(ride_execution)
-
-                current_date += timedelta(days=1)
-            db.session.commit()
-
-        elif data['datumIsEinmalig'] == False and data['zeitIsEinmalig'] == False:
-            # Wiederkehrende Fahrten mit Intervallen erstellen
-            while current_date <= end_date_obj:
-                if current_date.isoweekday() in weekdays:
-                    current_time = datetime.combine(current_date, local_start_datetime.time())
-                    end_time = datetime.combine(current_date, local_end_datetime.time())
-
-                    while current_time <= end_time:
-                        ride_execution = RideExecution(
-                            price=data['price'],
-                            isCanceled=False,
-                            delay=0,
-                            date=current_date,
-                            time=current_time.time(),
-                            stopplanID=data['stopplanID'],
-                            trainID=data['trainID'],
-                            employees=employee_list
-                        )
-                        db.session.add(ride_execution)
-                        rideExecution_list.append(ride_execution)
-                        current_time += timedelta(minutes=zeitIntervall)
-
-                current_date += timedelta(days=1)
-
-            db.session.commit()
+            slot_values = slot_array(parse_recurrence(data))
+            slots = slot_tuples(slot_values)
+        except ValueError as e:
+            return jsonify({'message': f'Ungültige Angaben zu Datum oder Zeit: {str(e)}'}), 400
+
+        # Doppelbelegung des Zuges unter Berücksichtigung der Fahrtdauer verhindern, sowohl mit bestehenden
+        # Fahrten als auch zwischen den neuen Zeitpunkten selbst (Zeitintervall kürzer als die Fahrtdauer)
+        train_conflicts = []
+        if slots:
+            index = build_train_index(slots[0][0], slots[-1][0], train_ids=[data['trainID']])
+            duration = index.durations.get(data['stopplanID'])
+            conflict_mask = index.conflicts(data['trainID'], slot_values, duration) | \
+                batch_overlap_mask(slot_values, duration)
+            train_conflicts = [{'date': slots[position][0].strftime('%d.%m.%Y'),
+                                'time': slots[position][1].strftime('%H:%M')}
+                               for position in np.flatnonzero(conflict_mask)]
+
+        # Mitarbeiter dürfen nicht gleichzeitig auf anderen Fahrten eingeteilt sein
+        crew_conflicts = []
+        if slots and employee_ssns:
+            crew_index = build_crew_index(slots[0][0], slots[-1][0], employee_ssns)
+            intervals = slot_intervals(slot_values, crew_index.durations.get(data['stopplanID']))
+            masks = {ssn: crew_index.overlap_mask(ssn, *intervals) for ssn in employee_ssns}
+            crew_conflicts = [{
+                'date': slots[position][0].strftime('%d.%m.%Y'),
+                'time': slots[position][1].strftime('%H:%M'),
+                'employees': sorted(ssn for ssn, mask in masks.items() if mask[position])
+            } for position in np.flatnonzero(np.logical_or.reduce(list(masks.values())))]
+
+        # Vorschau: Anzahl, Beispiele und Konflikte zurückgeben, ohne etwas zu speichern
+        if data.get('dryRun'):
+            return jsonify({
+                'dryRun': True,
+                'slotCount': len(slots),
+                'sample': [{'date': date.strftime('%d.%m.%Y'), 'time': slot_time.strftime('%H:%M')}
+                           for date, slot_time in slots[:DRY_RUN_SAMPLE_SIZE]],
+                'trainConflicts': train_conflicts,
+                'crewConflicts': crew_conflicts
+            }), 200
+
+        if train_conflicts:
+            return jsonify({
+                'message': f'Zug {data["trainID"]} ist zu {len(train_conflicts)} Zeitpunkten bereits unterwegs',
+                'conflicts': train_conflicts
+            }), 409
+        if crew_conflicts:
+            return jsonify({
+                'message': f'Mitarbeiter sind zu {len(crew_conflicts)} Zeitpunkten bereits eingeteilt',
+                'conflicts': crew_conflicts
+            }), 409
+
+        # Fahrtdurchführungen gesammelt in Blöcken einfügen
+        values = {
+            'price': data['price'],
+            'isCanceled': False,
+            'delay': 0,
+            'stopplanID': data['stopplanID'],
+            'trainID': data['trainID'],
+            'batchID': uuid.uuid4().hex  # Alle Fahrten dieser Anfrage gemeinsam rückgängig machbar
+        }
+        ride_ids = bulk_create_ride_executions(slots, values, employee_ssns)
+        add_rides(RideExecution.batchID == values['batchID'])
+        db.session.commit()
+        timetable.invalidate({date for date, _ in slots})
 
         # Erfolgreiche Antwort mit erstellten Fahrten zurückgeben
+        employee_list = [{
+            'ssn': employee.ssn,
+            'firstName': employee.firstName,
+            'lastName': employee.lastName,
+            'password': employee.password,
+            'department': employee.department.value,
+            'role': employee.role.value,
+            'username': employee.username
+        } for employee in (employees[ssn] for ssn in employee_ssns)]
+
         return jsonify([{
-            'id': ride_execution.id,
-            'price': ride_execution.price,
-            'isCanceled': ride_execution.isCanceled,
-            'delay': ride_execution.delay,
-            'date': ride_execution.date.strftime('%d.%m.%Y'),
-            'time': ride_execution.time.strftime('%H:%M'),
-            'stopplanID': ride_execution.stopplanID,
-            'trainID': ride_execution.trainID,
-            'employees': [{
-                'ssn': employee.ssn,
-                'firstName': employee.firstName,
-                'lastName': employee.lastName,
-                'password': employee.password,
-                'department': employee.department.value,
-                'role': employee.role.value,
-                'username': employee.username
-            } for employee in ride_execution.employees]
-        } for ride_execution in rideExecution_list]), 201
+            'id': ride_id,
+            'price': values['price'],
+            'isCanceled': values['isCanceled'],
+            'delay': values['delay'],
+            'date': date.strftime('%d.%m.%Y'),
+            'time': slot_time.strftime('%H:%M'),
+            'stopplanID': values['stopplanID'],
+            'trainID': values['trainID'],
+            'batchID': values['batchID'],
+            'employees': employee_list
+        } for ride_id, (date, slot_time) in zip(ride_ids, slots)]), 201
 
     except Exception as e:
         # Fehlerausgabe und Fehlermeldung zurückgeben
+        db.session.rollback()
         traceback.print_exc()
         return jsonify({'message': f'Fehler beim Erstellen der Fahrdurchführung: {str(e)}'}), 500
 
@@ -386,82 +375,10 @@ def get_available_trains():
 
         # Alle Züge abrufen
         all_trains = get_all_trains()  # Sicherstellen, dass die Daten korrekt deserialisiert werden
-        unavailable_trains = set()
-
-        start_date_obj = datetime.strptime(data['startDate'][:10], '%Y-%m-%d').date()
-        start_date_obj += timedelta(days=1)
-
-        if data['endDate']:
-            end_date_obj = datetime.strptime(data['endDate'][:10], '%Y-%m-%d').date()
-
-        local_timezone = ZoneInfo('Europe/Berlin')
-        utc_time = datetime.strptime(data['startTime'], '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=ZoneInfo("UTC"))
-        local_start_datetime = utc_time.astimezone(local_timezone).replace(second=0, microsecond=0)
-        if data['endTime']:
-            utc_time2 = datetime.strptime(data['endTime'], '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=ZoneInfo("UTC"))
-            local_end_datetime = utc_time2.astimezone(local_timezone).replace(second=0, microsecond=0)
-
-        weekdays = [day['value'] for day in data['selectedDays']] if data['selectedDays'] else []
-        zeitIntervall = data['zeitIntervall'] if data['zeitIntervall'] else 0
-
-        def round_to_minute(t: time):
-            return t.replace(second=0, microsecond=0)
-
-        local_start_time_rounded = round_to_minute(local_start_datetime.time())
-
-        # **Fall 1: Datum und Zeit einmalig**
-        if data['datumIsEinmalig'] and data['zeitIsEinmalig']:
-            ride_executions = RideExecution.query.filter_by(
-                date=start_date_obj,
-                time=local_start_time_rounded
-            ).all()
-            unavailable_trains.update([execution.trainID for execution in ride_executions])
-
-        # **Fall 2: Datum und Zeit im Intervall**
-        elif not data['datumIsEinmalig'] and not data['zeitIsEinmalig']:
-            current_date = start_date_obj
-            while current_date <= end_date_obj:  # Schleife durch alle Tage im Intervall
-                if current_date.isoweekday() in weekdays:  # Nur ausgewählte Wochentage prüfen
-                    current_time = datetime.combine(current_date, local_start_datetime.time())
-                    end_time = datetime.combine(current_date, local_end_datetime.time())
-
-                    while current_time <= end_time:  # Zeiten im Intervall prüfen
-                        rounded_time = current_time.time().replace(second=0, microsecond=0)
-                        executions = RideExecution.query.filter_by(
-                            date=current_date,
-                            time=rounded_time
-                        ).all()
-                        unavailable_trains.update([execution.trainID for execution in executions])
-                        current_time += timedelta(minutes=zeitIntervall)  # Zeitintervall hinzufügen
-
-                current_date += timedelta(days=1)
-
-        # **Fall 3: Datum einmalig, Zeit im Intervall**
-        elif data['datumIsEinmalig'] and not data['zeitIsEinmalig']:
-            current_time = datetime.combine(start_date_obj, local_start_datetime.time())
-            end_time = datetime.combine(start_date_obj, local_end_datetime.time())
-
-            while current_time <= end_time:
-                rounded_time = current_time.time().replace(second=0, microsecond=0)
-                executions = RideExecution.query.filter_by(
-                    date=start_date_obj,
-                    time=rounded_time
-                ).all()
-                unavailable_trains.update([execution.trainID for execution in executions])
-                current_time += timedelta(minutes=zeitIntervall)
-
-        # **Fall 4: Datum im Intervall, Zeit einmalig**
-        elif not data['datumIsEinmalig'] and data['zeitIsEinmalig']:
-            current_date = start_date_obj
-            while current_date <= end_date_obj:
-                if current_date.isoweekday() in weekdays:
-                    rounded_time = local_start_datetime.time().replace(second=0, microsecond=0)
-                    executions = RideExecution.query.filter_by(
-                        date=current_date,
-                        time=rounded_time
-                    ).all()
-                    unavailable_trains.update([execution.trainID for execution in executions])
-                current_date += timedelta(days=1)
+
+        # Angefragte Zeitpunkte einmalig berechnen und in einer Abfrage prüfen
+        slot_values = slot_array(parse_recurrence(data))
+        unavailable_trains = find_busy_trains(slot_values, data.get('stopplanID'))
 
         # Verfügbare Züge ermitteln, die nicht im Set der belegten Züge sind
         available_trains = [
@@ -471,17 +388,28 @@ def get_available_trains():
 
         return jsonify(available_trains), 200  # Liste der verfügbaren Züge zurückgeben
 
+    except (CircuitOpenError, requests.RequestException) as e:
+        return jsonify({'message': f'Fleet-Service nicht erreichbar: {str(e)}'}), 503
     except Exception as e:
         print(f"Fehler aufgetreten: {str(e)}")
         traceback.print_exc()
         return jsonify({'message': f'Fehler beim Abrufen der verfügbaren Züge: {str(e)}'}), 500
 
 
+def find_busy_trains(slot_values, stopplan_id=None):
+    # Züge, die zu einem der angefragten Zeitpunkte (inkl. Fahrtdauer) bereits unterwegs sind
+    if not len(slot_values):
+        return set()
 
+    # Eine Abfrage über den Zeitraum, danach alle Zeitpunkte je Zug auf einmal im Intervallindex prüfen
+    first_date, last_date = (value.date() for value in slot_values[[0, -1]].tolist())
+    index = build_train_index(first_date, last_date)
+    return index.busy(*slot_intervals(slot_values, index.durations.get(stopplan_id)))
 
-def get_all_trains():
+
+def fetch_all_trains():
     # Anfrage an den Zug-Endpoint senden
-    response = requests.get('http://127.0.0.1:5002/fleet/trains')
+    response = fleet_service.get('/fleet/trains')
 
     # Überprüfen, ob die Anfrage erfolgreich war
     if response.status_code != 200:
@@ -491,42 +419,92 @@ def get_all_trains():
     return response.json()
 
 
+# Zugliste des Fleet-Service zwischenspeichern, damit nicht jede Anfrage den Dienst aufruft
+fleet_trains_cache = TTLCache(fetch_all_trains, ttl=app.config['FLEET_TRAINS_CACHE_TTL'])
+
+
+def get_all_trains():
+    # Züge aus dem Zwischenspeicher, abgelaufene Daten werden im Hintergrund erneuert
+    return fleet_trains_cache.get()
+
+
+def train_capacities():
+    # Sitzplätze je Zug als Summe der numberOfSeats seiner Personenwagen, aus der zwischengespeicherten Zugliste
+    return {
+        train['trainID']: sum(car['numberOfSeats'] for car in train.get('passenger_cars', []))
+        for train in get_all_trains()
+    }
+
+
+@app.route('/webhooks/fleet/trains', methods=['POST'])
+@require_webhook_secret
+def invalidate_fleet_trains():
+    # Wird vom Fleet-Service nach Änderungen an Zügen aufgerufen
+    fleet_trains_cache.invalidate()
+    return jsonify({'message': 'Fleet trains cache invalidated'}), 200
+
+
 @app.route('/ride_executions')
 def get_all_ride_executions():
-    # Alle Fahrten aus der Datenbank abrufen
-    ride_executions = RideExecution.query.all()
-    ride_executions_list = []
+    # Filter und Seitengröße aus der Anfrage lesen
+    try:
+        date_from = parse_date_arg('from')
+        date_to = parse_date_arg('to')
+    except ValueError:
+        return jsonify({'message': 'Ungültiges Datum. Format sollte YYYY-MM-DD sein.'}), 400
+
+    # Filter direkt in SQL anwenden, Mitarbeiter seitenweise mit einer Abfrage laden
+    query = RideExecution.query.options(selectinload(RideExecution.employees))
+    if date_from:
+        query = query.filter(RideExecution.date >= date_from)
+    if date_to:
+        query = query.filter(RideExecution.date <= date_to)
+    if request.args.get('stopplanID'):
+        query = query.filter(RideExecution.stopplanID == request.args.get('stopplanID', type=int))
+    if request.args.get('trainID'):
+        query = query.filter(RideExecution.trainID == request.args.get('trainID', type=int))
+
+    # Abfragen mit Startdatum lesen ältere Fahrten zusätzlich aus dem Archiv
+    def archived(after=None):
+        if not date_from:
+            return None
+        return with_archived_employees(read_archived_rides(
+            app.config['RIDE_ARCHIVE_DIR'], date_from, date_to, request.args.get('stopplanID', type=int),
+            request.args.get('trainID', type=int), after))
+
+    # Im Streaming-Modus alle passenden Fahrten blockweise senden
+    stream_format = requested_stream_format()
+    if stream_format:
+        query = query.order_by(RideExecution.date, RideExecution.time, RideExecution.id)
+        if not date_from:
+            return stream_query(query, serialize_ride_execution, stream_format)
+        items = heapq.merge(archived(), query.yield_per(STREAM_BATCH_SIZE), key=ride_key)
+        return stream_items(items, serialize_ride_execution, stream_format)
+
+    try:
+        cursor = request.args.get('cursor')
+        ride_executions, next_cursor = paginate_ride_executions(
+            query, cursor, request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            archived(decode_cursor(cursor) if cursor else None))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
 
     # Für jede Fahrt die relevanten Daten sammeln
-    for ride_execution in ride_executions:
-        employee_list = []
-        # Liste der Mitarbeiter für jede Fahrt
-        for employee in ride_execution.employees:
-            employee_list.append({
-                'ssn': employee.ssn,
-                'firstName': employee.firstName,
-                'lastName': employee.lastName,
-                'password': employee.password,
-                'department': employee.department.value,
-                'role': employee.role.value,
-                'username': employee.username
-            })
-
-        # Die Fahrtdaten zusammenstellen
-        ride_executions_list.append({
-            'id': ride_execution.id,
-            'price': ride_execution.price,
-            'isCanceled': ride_execution.isCanceled,
-            'delay': ride_execution.delay,
-            'date': ride_execution.date.strftime('%d.%m.%Y'),  # Datum im Format dd.MM.yyyy
-            'time': ride_execution.time.strftime('%H:%M'),  # Uhrzeit im Format HH:mm
-            'stopplanID': ride_execution.stopplanID,
-            'trainID': ride_execution.trainID,
-            'employees': employee_list
-        })
+    ride_executions_list = [serialize_ride_execution(ride_execution) for ride_execution in ride_executions]
+
+    # Seite der Fahrten samt Cursor für die nächste Seite als JSON zurückgeben
+    return jsonify({'rideExecutions': ride_executions_list, 'nextCursor': next_cursor})
 
-    # Liste der Fahrten als JSON zurückgeben
-    return jsonify(ride_executions_list)
+
+def with_archived_employees(rides):
+    # Mitarbeiter archivierter Fahrten (nur SSN gespeichert) für die Ausgabe wieder als Objekte einsetzen
+    employees = None
+    for ride in rides:
+        if employees is None:
+            employees = {employee.ssn: employee for employee in Employee.query}
+        # Kopie, da die Fahrten im Segment-Zwischenspeicher unverändert bleiben müssen
+        yield SimpleNamespace(**dict(vars(ride), employees=[employees[str(ssn)] for ssn in ride.employees
+                                                            if str(ssn) in employees]))
 
 
 @app.route('/ride_execution/<int:ride_execution_id>', methods=['DELETE'])
@@ -534,14 +512,37 @@ def delete_ride_execution(ride_execution_id):
     # Versuch, die Fahrt anhand der ID zu finden
     ride_execution = RideExecution.query.get_or_404(ride_execution_id)
 
-    # Fahrt aus der Datenbank löschen
+    # Fahrt aus der Datenbank löschen und aus den Umsatzsummen herausrechnen
+    if not ride_execution.isCanceled:
+        apply_summary_deltas([(ride_execution.stopplanID, ride_execution.date, 1, ride_execution.price)], -1)
     db.session.delete(ride_execution)
     db.session.commit()
+    timetable.invalidate([ride_execution.date])
 
     # Bestätigung der Löschung zurückgeben
     return jsonify({'message': 'Ride_Execution deleted'}), 200
 
 
+@app.route('/ride_executions/batch/<batch_id>', methods=['DELETE'])
+def delete_ride_execution_batch(batch_id):
+    # Alle in einer Anfrage angelegten Fahrten samt Mitarbeiterzuordnungen mit zwei Anweisungen löschen
+    batch_rides = db.select(RideExecution.id).where(RideExecution.batchID == batch_id)
+    dates = [date for (date,) in db.session.query(RideExecution.date).filter(RideExecution.batchID == batch_id).distinct()]
+    if not dates:
+        return jsonify({'message': 'Batch not found'}), 404
+
+    remove_rides(RideExecution.batchID == batch_id)
+    db.session.execute(execution_employee.delete().where(execution_employee.c.execution_id.in_(batch_rides)))
+    deleted = db.session.execute(
+        db.delete(RideExecution).where(RideExecution.batchID == batch_id),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    db.session.commit()
+    timetable.invalidate(dates)
+
+    return jsonify({'message': 'Ride_Execution batch deleted', 'batchID': batch_id, 'deleted': deleted}), 200
+
+
 @app.route('/ride_execution/<int:ride_execution_id>', methods=['PUT'])
 def update_ride_execution(ride_execution_id):
     # Versuch, die Fahrt anhand der ID zu finden
@@ -554,21 +555,43 @@ def update_ride_execution(ride_execution_id):
     # Die zu aktualisierenden Daten aus der Anfrage holen
     data = request.get_json()
 
+    # Verspätung und Wendezeit müssen ganze, nicht negative Minuten sein
+    try:
+        delay = parse_minutes(data, 'delay', ride_execution.delay)
+        buffer = timedelta(minutes=parse_minutes(data, 'turnaroundBuffer', app.config['TURNAROUND_BUFFER_MINUTES']))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
     # Überprüfen, ob 'isCanceled' in den Daten enthalten ist
+    was_active = not ride_execution.isCanceled
     if 'isCanceled' in data:
         if data['isCanceled'] == "Ja":
             ride_execution.isCanceled = True
             ride_execution.delay = 0  # Falls die Fahrt abgesagt ist, Verzögerung auf 0 setzen
+            ride_execution.reportedDelay = 0
         else:
             ride_execution.isCanceled = False
 
     # Verzögerung aktualisieren, falls angegeben
-    if 'delay' in data:
-        ride_execution.delay = data['delay']
+    if 'delay' in data and not ride_execution.isCanceled:
+        ride_execution.delay = delay
+        ride_execution.reportedDelay = delay
 
     try:
+        # Folgeverspätungen von Zug und Personal am selben Tag in derselben Transaktion neu berechnen,
+        # auch wenn die Verspätung sinkt oder die Fahrt storniert bzw. reaktiviert wird
+        propagated = []
+        if ('delay' in data or was_active != (not ride_execution.isCanceled)) and data.get('propagate', True):
+            propagated = propagate_delay(ride_execution, buffer)
+
+        # Stornierung bzw. Reaktivierung in den Umsatzsummen nachführen
+        if was_active != (not ride_execution.isCanceled):
+            apply_summary_deltas([(ride_execution.stopplanID, ride_execution.date, 1, ride_execution.price)],
+                                 -1 if was_active else 1)
+
         # Änderungen in der Datenbank speichern
         db.session.commit()
+        timetable.invalidate([ride_execution.date])
         return jsonify({
             "message": "RideExecution updated successfully",
             "rideExecution": {
@@ -578,7 +601,8 @@ def update_ride_execution(ride_execution_id):
                 'delay': ride_execution.delay,
                 'stopplanID': ride_execution.stopplanID,
                 'trainID': ride_execution.trainID
-            }
+            },
+            "propagated": propagated
         }), 200
     except Exception as e:
         # Falls ein Fehler auftritt, Änderungen zurücksetzen und Fehlernachricht zurückgeben
@@ -586,42 +610,488 @@ def update_ride_execution(ride_execution_id):
         return jsonify({"error": f"Update failed: {str(e)}"}), 500
 
 
+def parse_minutes(data, key, default):
+    # Ganze Minuten >= 0 aus den Anfragedaten, auch als Zahl in Textform
+    if key not in data:
+        return default
+    value = data[key]
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError(f'{key} muss eine ganze Zahl von Minuten >= 0 sein')
+    return value
+
+
+@app.route('/ride_executions/bulk', methods=['PUT'])
+def bulk_update_ride_executions():
+    # Viele Fahrten per Filter oder ID-Liste mit einem einzigen UPDATE stornieren oder verspäten
+    data = request.get_json() or {}
+
+    try:
+        conditions = ride_execution_conditions(data)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    if not conditions:
+        return jsonify({'message': 'Mindestens ein Filter (ids, stopplanID, trainID, from, to, timeFrom, timeTo) wird benötigt'}), 400
+
+    # Änderungen wie bei PUT /ride_execution/<id> übernehmen
+    values = {}
+    if 'isCanceled' in data:
+        values['isCanceled'] = data['isCanceled'] in (True, "Ja")
+        if values['isCanceled']:
+            values['delay'] = 0  # Falls die Fahrt abgesagt ist, Verzögerung auf 0 setzen
+            values['reportedDelay'] = 0
+    if 'delay' in data and not values.get('isCanceled'):
+        try:
+            values['delay'] = parse_minutes(data, 'delay', 0)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        values['reportedDelay'] = values['delay']
+        if 'isCanceled' not in data:
+            # Stornierte Fahrten behalten ihre Verzögerung von 0
+            conditions.append(db.or_(RideExecution.isCanceled.is_(None), RideExecution.isCanceled == False))
+    if not values:
+        return jsonify({'message': 'Keine Änderungen (isCanceled, delay) angegeben'}), 400
+
+    try:
+        # Fahrten, deren Stornierung sich ändert, vor dem UPDATE aus bzw. in die Umsatzsummen rechnen
+        if values.get('isCanceled'):
+            remove_rides(*conditions)
+        elif 'isCanceled' in values:
+            apply_summary_deltas(ride_totals(*conditions, canceled=True), 1)
+
+        result = db.session.execute(
+            db.update(RideExecution).where(*conditions).values(**values).returning(RideExecution.id, RideExecution.date),
+            execution_options={'synchronize_session': False}
+        ).all()
+        affected_ids = sorted(ride_id for ride_id, _ in result)
+        db.session.commit()
+        timetable.invalidate({date for _, date in result})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Update failed: {str(e)}"}), 500
+
+    return jsonify({
+        'message': 'RideExecutions updated successfully',
+        'count': len(affected_ids),
+        'ids': affected_ids
+    }), 200
+
+
+def ride_execution_conditions(criteria):
+    # SQL-Bedingungen aus ID-Liste, Stopplan, Zug, Datumsbereich und Zeitfenster
+    conditions = []
+    if criteria.get('ids'):
+        conditions.append(RideExecution.id.in_(criteria['ids']))
+    if criteria.get('stopplanID'):
+        conditions.append(RideExecution.stopplanID == criteria['stopplanID'])
+    if criteria.get('trainID'):
+        conditions.append(RideExecution.trainID == criteria['trainID'])
+    try:
+        if criteria.get('from'):
+            conditions.append(RideExecution.date >= datetime.strptime(criteria['from'], '%Y-%m-%d').date())
+        if criteria.get('to'):
+            conditions.append(RideExecution.date <= datetime.strptime(criteria['to'], '%Y-%m-%d').date())
+        if criteria.get('timeFrom'):
+            conditions.append(RideExecution.time >= datetime.strptime(criteria['timeFrom'], '%H:%M').time())
+        if criteria.get('timeTo'):
+            conditions.append(RideExecution.time <= datetime.strptime(criteria['timeTo'], '%H:%M').time())
+    except ValueError:
+        raise ValueError('Ungültiger Filter. Datum als YYYY-MM-DD, Uhrzeit als HH:MM angeben.')
+    return conditions
+
+
+ROSTER_DEFAULT_DAYS = 7
+
+
 @app.route("/employees")
 @cross_origin()
 def get_all_employees():
-    # Alle Mitarbeiter aus der Datenbank abrufen
-    employees = Employee.query.all()
-    employee_list = []
+    # Alle Mitarbeiter samt Anzahl ihrer Fahrten; die Fahrten selbst liefert /employees/<ssn>/roster
+    ride_counts = employee_ride_counts(datetime.now().date())
+    query = Employee.query
 
-    # Liste der Mitarbeiter erstellen
-    for employee in employees:
-        rideExecution_list = []
-        # Für jeden Mitarbeiter die Fahrten abrufen, an denen er beteiligt ist
-        for ride_execution in employee.rideExecutions:
-            rideExecution_list.append({
-                'id': ride_execution.id,
-                'price': ride_execution.price,
-                'isCanceled': ride_execution.isCanceled,
-                'delay': ride_execution.delay,
-                'date': ride_execution.date.strftime('%d.%m.%Y'),  # Datum im Format dd.MM.yyyy
-                'time': ride_execution.time.strftime('%H:%M'),  # Uhrzeit im Format HH:mm
-                'stopplan': {
-                    'name': ride_execution.stopplan.name,
-                },
-                'trainID': ride_execution.trainID
-            })
+    # Auf Wunsch blockweise streamen statt die ganze Liste aufzubauen
+    stream_format = requested_stream_format()
+    if stream_format:
+        return stream_query(query.order_by(Employee.ssn),
+                            lambda employee: serialize_employee(employee, ride_counts), stream_format)
 
-        # Die Mitarbeiterdaten mit Fahrten zusammenstellen
-        employee_list.append({
-            'ssn': employee.ssn,
-            'firstName': employee.firstName,
-            'lastName': employee.lastName,
-            'password': employee.password,
-            'department': employee.department.value,
-            'role': employee.role.value,
-            'username': employee.username,
-            'rideExecutions': rideExecution_list
+    # Liste der Mitarbeiter als JSON zurückgeben
+    return jsonify([serialize_employee(employee, ride_counts) for employee in query.all()])
+
+
+def employee_ride_counts(today):
+    # Gesamtzahl und anstehende Fahrten je Mitarbeiter mit einer gruppierten Abfrage
+    rows = db.session.query(
+        execution_employee.c.employee_ssn,
+        db.func.count(),
+        db.func.sum(db.case((RideExecution.date >= today, 1), else_=0))
+    ).join(RideExecution, RideExecution.id == execution_employee.c.execution_id) \
+        .group_by(execution_employee.c.employee_ssn)
+    return {str(ssn): (total, upcoming or 0) for ssn, total, upcoming in rows}
+
+
+def serialize_employee(employee, ride_counts):
+    total, upcoming = ride_counts.get(employee.ssn, (0, 0))
+    return {
+        'ssn': employee.ssn,
+        'firstName': employee.firstName,
+        'lastName': employee.lastName,
+        'password': employee.password,
+        'department': employee.department.value,
+        'role': employee.role.value,
+        'username': employee.username,
+        'rideExecutionCount': total,
+        'upcomingRideExecutionCount': upcoming
+    }
+
+
+@app.route("/employees/<ssn>/roster")
+@cross_origin()
+def get_employee_roster(ssn):
+    # Dienstplan eines Mitarbeiters, standardmäßig die kommende Woche
+    if not db.session.get(Employee, ssn):
+        return jsonify({'message': 'Mitarbeiter nicht gefunden'}), 404
+    try:
+        date_from = parse_date_arg('from', datetime.now().date())
+        date_to = parse_date_arg('to', date_from + timedelta(days=ROSTER_DEFAULT_DAYS - 1))
+    except ValueError:
+        return jsonify({'message': 'Ungültiges Datum. Format sollte YYYY-MM-DD sein.'}), 400
+
+    # Eine Abfrage über den Index (employee_ssn, execution_id) mit den Fahrten und Stopplannamen
+    rows = db.session.query(
+        RideExecution.id, RideExecution.price, RideExecution.isCanceled, RideExecution.delay,
+        RideExecution.date, RideExecution.time, RideExecution.trainID, Stopplan.name
+    ).join(execution_employee, execution_employee.c.execution_id == RideExecution.id) \
+        .join(Stopplan, Stopplan.id == RideExecution.stopplanID) \
+        .filter(execution_employee.c.employee_ssn == ssn,
+                RideExecution.date >= date_from, RideExecution.date <= date_to) \
+        .order_by(RideExecution.date, RideExecution.time, RideExecution.id)
+
+    return jsonify([{
+        'id': ride_id,
+        'price': price,
+        'isCanceled': is_canceled,
+        'delay': delay,
+        'date': ride_date.strftime('%d.%m.%Y'),  # Datum im Format dd.MM.yyyy
+        'time': ride_time.strftime('%H:%M'),  # Uhrzeit im Format HH:mm
+        'stopplan': {
+            'name': stopplan_name,
+        },
+        'trainID': train_id
+    } for ride_id, price, is_canceled, delay, ride_date, ride_time, train_id, stopplan_name in rows])
+
+
+def parse_date_arg(name, default=None):
+    # Datumsparameter der Anfrage im Format YYYY-MM-DD lesen
+    value = request.args.get(name)
+    if not value:
+        return default
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+@app.route('/stations/<int:station_id>/departures')
+def get_station_departures(station_id):
+    # Abfahrtstafel: Fahrten aller Stoppläne des Bahnhofs im Zeitfenster, nach Zeit sortiert
+    station = TrainStation.query.get_or_404(station_id)
+
+    try:
+        window_start = datetime.strptime(request.args['from'], '%Y-%m-%dT%H:%M') if request.args.get('from') \
+            else datetime.now().replace(second=0, microsecond=0)
+        window = request.args.get('window', 120, type=int)  # Minuten
+    except ValueError:
+        return jsonify({'message': 'Ungültiger Zeitpunkt. Format sollte YYYY-MM-DDTHH:MM sein.'}), 400
+    window_end = window_start + timedelta(minutes=max(window, 0))
+
+    # Fahrzeit vom ersten Halt bis zu diesem Bahnhof je Stopplan; ohne bekannte Streckenfolge gilt
+    # die Abfahrt am ersten Halt
+    stopplan_ids = [stopplan_id for (stopplan_id,) in db.session.query(trainStation_stopplan.c.stopplan_id).filter(
+        trainStation_stopplan.c.trainStation_id == station_id
+    )]
+    offsets = {stopplan_id: dict(stops).get(station_id, 0)
+               for stopplan_id, stops in stopplan_station_offsets(stopplan_ids).items()}
+
+    # Fahrten, die am ersten Halt bis zur größten Fahrzeit vor dem Fenster abfahren, können den Bahnhof
+    # im Fenster erreichen; Bereichsabfrage über den Index (stopplanID, date, time)
+    origin_start = window_start - timedelta(minutes=max(offsets.values(), default=0))
+    rides = db.session.query(RideExecution, Stopplan.name).join(
+        Stopplan, Stopplan.id == RideExecution.stopplanID
+    ).filter(
+        RideExecution.stopplanID.in_(stopplan_ids),
+        RideExecution.date.between(origin_start.date(), window_end.date()),
+        db.or_(RideExecution.date > origin_start.date(), RideExecution.time >= origin_start.time()),
+        db.or_(RideExecution.date < window_end.date(), RideExecution.time <= window_end.time())
+    ).all()
+
+    departures = []
+    for ride_execution, stopplan_name in rides:
+        planned = datetime.combine(ride_execution.date, ride_execution.time) + \
+            timedelta(minutes=offsets.get(ride_execution.stopplanID, 0))
+        if window_start <= planned <= window_end:
+            departures.append((planned, ride_execution.id, ride_execution, stopplan_name))
+    departures.sort(key=lambda departure: departure[:2])
+
+    departure_list = []
+    for planned, _, ride_execution, stopplan_name in departures:
+        departure_list.append({
+            'rideExecutionID': ride_execution.id,
+            'stopplanID': ride_execution.stopplanID,
+            'stopplanName': stopplan_name,
+            'trainID': ride_execution.trainID,
+            'date': planned.strftime('%d.%m.%Y'),
+            'time': planned.strftime('%H:%M'),
+            'expectedTime': (planned + timedelta(minutes=ride_execution.delay or 0)).strftime('%H:%M'),
+            'delay': ride_execution.delay,
+            'isCanceled': ride_execution.isCanceled
         })
 
-    # Liste der Mitarbeiter als JSON zurückgeben
-    return jsonify(employee_list)
+    return jsonify({
+        'station': {'id': station.id, 'name': station.name, 'address': station.address},
+        'departures': departure_list
+    })
+
+
+@app.route('/webhooks/track/changes', methods=['POST'])
+@require_webhook_secret
+def track_changes_available():
+    # Wird vom Track-Service nach jeder protokollierten Änderung aufgerufen; die Übernahme läuft im Hintergrund
+    track_replicator.notify()
+    return jsonify({'message': 'Replication triggered'}), 202
+
+
+@app.cli.command('sync-tracks')
+def sync_tracks_command():
+    # Lokale Streckendaten einmalig aus dem Änderungsprotokoll des Track-Service nachführen
+    try:
+        applied = track_replicator.sync()
+    except (CircuitOpenError, requests.RequestException) as e:
+        raise click.ClickException(f'Track-Service nicht erreichbar: {str(e)}')
+    click.echo(f'{applied} Änderungen übernommen, Version {track_replicator.version()}')
+
+
+@app.cli.command('replicate-tracks')
+def replicate_tracks_command():
+    # Dauerhafter Replikations-Worker für Deployments mit mehreren Webserver-Prozessen
+    # (dort TRACK_REPLICATION_IN_PROCESS=0 setzen, damit nur dieser Prozess in die Datenbank schreibt)
+    if app.config['TRACK_REPLICATION_INTERVAL'] <= 0:
+        raise click.ClickException('TRACK_REPLICATION_INTERVAL muss größer als 0 sein')
+    click.echo(f'Replikation alle {app.config["TRACK_REPLICATION_INTERVAL"]} Sekunden, Abbruch mit Strg+C')
+    track_replicator.run(app.config['TRACK_REPLICATION_INTERVAL'])
+
+
+@app.route('/journeys')
+def get_journey():
+    # Schnellste Verbindung von Bahnhof A nach B ab einem Zeitpunkt (Connection Scan Algorithm)
+    origin = request.args.get('from', type=int)
+    destination = request.args.get('to', type=int)
+    if origin is None or destination is None:
+        return jsonify({'message': 'Fehlende Daten: from oder to'}), 400
+    try:
+        departure = datetime.strptime(request.args['departure'], '%Y-%m-%dT%H:%M') if request.args.get('departure') \
+            else datetime.now().replace(second=0, microsecond=0)
+    except ValueError:
+        return jsonify({'message': 'Ungültiger Zeitpunkt. Format sollte YYYY-MM-DDTHH:MM sein.'}), 400
+
+    legs = timetable.earliest_arrival(origin, destination, departure, request.args.get('minTransfer', 0, type=int))
+    if legs is None:
+        return jsonify({'message': 'Keine Verbindung gefunden'}), 404
+
+    return jsonify({
+        'departure': legs[0]['departure'].strftime('%d.%m.%Y %H:%M'),
+        'arrival': legs[-1]['arrival'].strftime('%d.%m.%Y %H:%M'),
+        'legs': [dict(leg, departure=leg['departure'].strftime('%d.%m.%Y %H:%M'),
+                      arrival=leg['arrival'].strftime('%d.%m.%Y %H:%M')) for leg in legs]
+    })
+
+
+@app.route('/gtfs')
+def export_gtfs():
+    # GTFS-Feed direkt aus den Fahrplantabellen als Zip streamen
+    return Response(stream_with_context(gtfs_feed()), mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename={gtfs_filename()}'})
+
+
+def gtfs_feed():
+    # Feed mit den konfigurierten Angaben zum Betreiber erzeugen
+    return generate_gtfs_zip(app.config['GTFS_AGENCY_NAME'], app.config['GTFS_AGENCY_URL'])
+
+
+@app.cli.command('export-gtfs')
+@click.argument('path', required=False)
+def export_gtfs_command(path):
+    # GTFS-Feed in eine Datei schreiben, z.B. "flask --app app export-gtfs feed.zip"
+    path = path or gtfs_filename()
+    with open(path, 'wb') as file:
+        for chunk in gtfs_feed():
+            file.write(chunk)
+    click.echo(f'GTFS-Feed gespeichert: {path}')
+    missing = stations_without_coordinates()
+    if missing:
+        click.echo(f'Ohne Lage nicht exportiert ({len(missing)} Bahnhöfe): {", ".join(missing)}', err=True)
+
+
+@app.route('/gtfs', methods=['POST'])
+def import_gtfs_feed():
+    # Hochgeladenen GTFS-Feed (Formularfeld "feed") gesammelt übernehmen
+    feed = request.files.get('feed')
+    if not feed:
+        return jsonify({'message': 'Fehlende Daten: feed'}), 400
+    try:
+        train_ids = parse_train_ids(json.loads(request.form.get('trainIDs') or '{}'))
+    except ValueError as e:
+        return jsonify({'message': f'Ungültige Zuordnung trainIDs: {str(e)}'}), 400
+
+    try:
+        result = import_gtfs(feed.stream, train_ids, request.form.get('trackID', type=int))
+    except (zipfile.BadZipFile, KeyError, ValueError) as e:
+        db.session.rollback()
+        return jsonify({'message': f'Ungültiger GTFS-Feed: {str(e)}'}), 400
+
+    timetable.invalidate()
+    return jsonify(result), 201
+
+
+def parse_train_ids(mapping):
+    # Zuordnung Fahrzeug des Feeds (block_id bzw. trip_id) -> Zug der Flotte, Zug-IDs als ganze Zahlen
+    if not isinstance(mapping, dict):
+        raise ValueError('erwartet ein Objekt {"block_id": Zug-ID}')
+    train_ids = {}
+    for vehicle, train_id in mapping.items():
+        if isinstance(train_id, str) and train_id.strip().isdigit():
+            train_id = int(train_id)
+        if isinstance(train_id, bool) or not isinstance(train_id, int):
+            raise ValueError(f'Zug-ID für {vehicle} muss eine ganze Zahl sein')
+        train_ids[str(vehicle)] = train_id
+    return train_ids
+
+
+@app.cli.command('import-gtfs')
+@click.argument('path')
+@click.option('--train', 'trains', multiple=True, metavar='BLOCK=ZUG',
+              help='Zug der Flotte für ein Fahrzeug (block_id) des Feeds, mehrfach angebbar')
+@click.option('--track-id', type=int, help='Strecke für Linien ohne passende lokale Strecke')
+def import_gtfs_command(path, trains, track_id):
+    # GTFS-Feed aus einer Datei laden, z.B. "flask --app app import-gtfs feed.zip --train U1=1 --train U2=4"
+    try:
+        if any('=' not in train for train in trains):
+            raise ValueError('erwartet BLOCK=ZUG')
+        train_ids = parse_train_ids(dict(train.rsplit('=', 1) for train in trains))
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--train')
+    result = import_gtfs(path, train_ids, track_id)
+    click.echo(f'GTFS-Feed importiert: {result}')
+
+
+@app.route('/capacity')
+def get_capacity():
+    # Angebotene Sitzplätze je Stopplan, Tag und Stunde im Zeitraum
+    try:
+        date_from = parse_date_arg('from', datetime.now().date())
+        date_to = parse_date_arg('to', date_from + timedelta(days=7))
+    except ValueError:
+        return jsonify({'message': 'Ungültiges Datum. Format sollte YYYY-MM-DD sein.'}), 400
+    group_by = request.args.get('groupBy', 'hour')
+    if group_by not in ('stopplan', 'day', 'hour'):
+        return jsonify({'message': 'groupBy muss stopplan, day oder hour sein'}), 400
+
+    try:
+        capacities = train_capacities()
+    except (CircuitOpenError, requests.RequestException) as e:
+        return jsonify({'message': f'Fleet-Service nicht erreichbar: {str(e)}'}), 503
+
+    # Kapazität über einen CASE-Ausdruck je Zug direkt in der gruppierten Abfrage summieren
+    seats = db.case(capacities, value=RideExecution.trainID, else_=0) if capacities else db.literal(0)
+    hour = db.cast(db.func.strftime('%H', RideExecution.time), db.Integer)
+    groups = [RideExecution.stopplanID]
+    if group_by in ('day', 'hour'):
+        groups.append(RideExecution.date)
+    if group_by == 'hour':
+        groups.append(hour)
+
+    query = db.session.query(
+        *groups,
+        db.func.count(RideExecution.id),
+        db.func.sum(seats),
+        db.func.sum(db.case((RideExecution.trainID.in_(list(capacities)), 0), else_=1))
+    ).filter(
+        RideExecution.date.between(date_from, date_to),
+        db.or_(RideExecution.isCanceled.is_(None), RideExecution.isCanceled == False)
+    ).group_by(*groups).order_by(*groups)
+    if request.args.get('stopplanID'):
+        query = query.filter(RideExecution.stopplanID == request.args.get('stopplanID', type=int))
+
+    result = []
+    for row in query:
+        entry = {'stopplanID': row[0]}
+        if group_by in ('day', 'hour'):
+            entry['date'] = row[1].strftime('%d.%m.%Y')
+        if group_by == 'hour':
+            entry['hour'] = row[2]
+        entry['rides'], entry['seats'], entry['ridesWithoutCapacity'] = row[-3], row[-2] or 0, row[-1]
+        result.append(entry)
+    return jsonify(result)
+
+
+@app.route('/analytics/revenue')
+def get_revenue_analytics():
+    # Umsatz und Nutzungsgebühren je Stopplan und Monat (bzw. Tag) aus den laufend geführten Summentabellen
+    try:
+        date_from = parse_date_arg('from')
+        date_to = parse_date_arg('to')
+    except ValueError:
+        return jsonify({'message': 'Ungültiges Datum. Format sollte YYYY-MM-DD sein.'}), 400
+    group_by = request.args.get('groupBy', 'month')
+    if group_by not in ('day', 'month'):
+        return jsonify({'message': 'groupBy muss day oder month sein'}), 400
+
+    if group_by == 'month':
+        summary, period = RideMonthlySummary, RideMonthlySummary.month
+        date_from = date_from.replace(day=1) if date_from else None
+        date_to = date_to.replace(day=1) if date_to else None
+    else:
+        summary, period = RideDailySummary, RideDailySummary.date
+
+    query = summary.query.filter(summary.rides > 0)
+    if date_from:
+        query = query.filter(period >= date_from)
+    if date_to:
+        query = query.filter(period <= date_to)
+    if request.args.get('stopplanID'):
+        query = query.filter(summary.stopplanID == request.args.get('stopplanID', type=int))
+
+    # Nutzungsgebühr pro Fahrt nach aktuellem Stand der Strecke
+    fees = usage_fee_per_ride()
+    result = []
+    for row in query.order_by(period, summary.stopplanID):
+        usage_fees = row.rides * (fees.get(row.stopplanID) or 0)
+        result.append({
+            'stopplanID': row.stopplanID,
+            **({'month': row.month.strftime('%m.%Y')} if group_by == 'month' else {'date': row.date.strftime('%d.%m.%Y')}),
+            'rides': row.rides,
+            'revenue': round(row.revenue, 2),
+            'usageFees': round(usage_fees, 2),
+            'margin': round(row.revenue - usage_fees, 2)
+        })
+    return jsonify(result)
+
+
+@app.cli.command('archive-rides')
+@click.option('--before', help='Stichtag YYYY-MM-DD, Standard: heute minus RIDE_ARCHIVE_HORIZON_DAYS')
+def archive_rides_command(before):
+    # Vergangene Fahrten in komprimierte Monatssegmente verschieben, z.B. regelmäßig per Cron
+    before = datetime.strptime(before, '%Y-%m-%d').date() if before else \
+        datetime.now().date() - timedelta(days=app.config['RIDE_ARCHIVE_HORIZON_DAYS'])
+    archived = archive_rides(before, app.config['RIDE_ARCHIVE_DIR'])
+    click.echo(f'{archived} Fahrten vor dem {before.strftime("%d.%m.%Y")} archiviert')
+
+
+@app.cli.command('drop-archive-month')
+@click.argument('month')
+def drop_archive_month_command(month):
+    # Einen ganzen archivierten Monat durch Löschen seines Segments entfernen, z.B. "drop-archive-month 2024-01"
+    month = datetime.strptime(month, '%Y-%m').date()
+    if drop_segment(app.config['RIDE_ARCHIVE_DIR'], month):
+        click.echo(f'Archiv {month.strftime("%m.%Y")} gelöscht')
+    else:
+        click.echo(f'Kein Archiv für {month.strftime("%m.%Y")} vorhanden')
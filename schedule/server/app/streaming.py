@@ -0,0 +1,57 @@
+from flask import Response, current_app, request, stream_with_context
+
+# Anzahl der Datensätze, die pro Block aus der Datenbank gelesen und gesendet werden
+STREAM_BATCH_SIZE = 500
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def requested_stream_format():
+    # 'ndjson' per Accept-Header oder ?format=ndjson, 'json' per ?stream=true, sonst None
+    if request.args.get('format') == 'ndjson' or NDJSON_MIMETYPE in request.headers.get('Accept', ''):
+        return 'ndjson'
+    if request.args.get('stream', '').lower() in ('1', 'true', 'ja'):
+        return 'json'
+    return None
+
+
+def generate_json_array(items, serialize, batch_size=STREAM_BATCH_SIZE):
+    # JSON-Array blockweise erzeugen, ohne die ganze Liste im Speicher zu halten
+    dumps = current_app.json.dumps
+    yield '['
+    separator = ''
+    buffer = []
+    for item in items:
+        buffer.append(dumps(serialize(item)))
+        if len(buffer) >= batch_size:
+            yield separator + ','.join(buffer)
+            separator = ','
+            buffer = []
+    if buffer:
+        yield separator + ','.join(buffer)
+    yield ']'
+
+
+def generate_ndjson(items, serialize, batch_size=STREAM_BATCH_SIZE):
+    # Ein JSON-Objekt pro Zeile
+    dumps = current_app.json.dumps
+    buffer = []
+    for item in items:
+        buffer.append(dumps(serialize(item)) + '\n')
+        if len(buffer) >= batch_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_query(query, serialize, stream_format, batch_size=STREAM_BATCH_SIZE):
+    # Abfrage mit yield_per durchlaufen und als gestreamte Antwort senden
+    return stream_items(query.yield_per(batch_size), serialize, stream_format, batch_size)
+
+
+def stream_items(items, serialize, stream_format, batch_size=STREAM_BATCH_SIZE):
+    # Beliebige Folge von Datensätzen als gestreamte Antwort senden
+    if stream_format == 'ndjson':
+        return Response(stream_with_context(generate_ndjson(items, serialize, batch_size)), mimetype=NDJSON_MIMETYPE)
+    return Response(stream_with_context(generate_json_array(items, serialize, batch_size)), mimetype='application/json')
@@ -0,0 +1,124 @@
+from datetime import datetime
+
+from app import db
+from app.models import Stopplan, Track, Section, TrainStation, Warning, track_section, section_warning, \
+    trainStation_stopplan
+
+# Warnungen ohne Ende (endDate NULL im Track-Service) gelten lokal bis zu diesem Zeitpunkt
+OPEN_END = datetime(9999, 12, 31)
+
+
+def upsert_section(data):
+    # Lokale Kopie eines Abschnitts aus den Daten des Track-Service anlegen oder aktualisieren
+    section = Section.query.get(data['sectionID'])
+    if not section:
+        section = Section(id=data['sectionID'])
+        db.session.add(section)
+    section.usageFee = data['usageFee']
+    section.length = data['length']
+    section.maxSpeed = data['maxSpeed']
+    section.trackGauge = int(data['trackGauge'])
+    section.start_station_id = data['startStationID']
+    section.end_station_id = data['endStationID']
+    if 'warningIDs' in data:
+        section.warnings = Warning.query.filter(Warning.id.in_(data['warningIDs'])).all()
+    return section
+
+
+def upsert_track(data):
+    # Lokale Kopie einer Strecke samt Abschnitten (Format von GET /track/tracks/<id>) übernehmen
+    track = Track.query.get(data['trackID'])
+    if not track:
+        track = Track(id=data['trackID'])
+        db.session.add(track)
+    track.name = data['trackName']
+    track.sections = [upsert_section(section_data) for section_data in data['sections']]
+    db.session.flush()
+    return track
+
+
+def refresh_min_prices(track_ids):
+    # Mindestpreis (Durchschnitt der Nutzungsgebühren) nur für Stoppläne der betroffenen Strecken neu setzen
+    track_ids = list(track_ids)
+    if not track_ids:
+        return
+    average_fee = db.select(db.func.avg(Section.usageFee)).join(
+        track_section, track_section.c.section_id == Section.id
+    ).where(track_section.c.track_id == Stopplan.trackID).scalar_subquery()
+
+    db.session.execute(
+        db.update(Stopplan).where(Stopplan.trackID.in_(track_ids)).values(minPrice=db.func.coalesce(average_fee, 0)),
+        execution_options={'synchronize_session': 'fetch'}
+    )
+
+
+def tracks_with_section(section_id):
+    # Strecken, die den Abschnitt enthalten
+    return [row.track_id for row in db.session.query(track_section.c.track_id).filter(
+        track_section.c.section_id == section_id)]
+
+
+def upsert_station(data):
+    station = db.session.get(TrainStation, data['stationID'])
+    if not station:
+        station = TrainStation(id=data['stationID'])
+        db.session.add(station)
+    station.name = data['stationName']
+    station.address = data['address']
+    return station
+
+
+def upsert_warning(data):
+    warning = db.session.get(Warning, data['warningID'])
+    if not warning:
+        warning = Warning(id=data['warningID'])
+        db.session.add(warning)
+    warning.name = data['warningName']
+    warning.description = data['description']
+    warning.startDate = datetime.strptime(data['startDate'], '%Y-%m-%d %H:%M:%S')
+    warning.endDate = datetime.strptime(data['endDate'], '%Y-%m-%d %H:%M:%S') if data.get('endDate') else OPEN_END
+    return warning
+
+
+def delete_station(station_id):
+    db.session.execute(trainStation_stopplan.delete().where(trainStation_stopplan.c.trainStation_id == station_id))
+    db.session.execute(db.delete(TrainStation).where(TrainStation.id == station_id))
+
+
+def delete_section(section_id):
+    db.session.execute(section_warning.delete().where(section_warning.c.section_id == section_id))
+    db.session.execute(track_section.delete().where(track_section.c.section_id == section_id))
+    db.session.execute(db.delete(Section).where(Section.id == section_id))
+
+
+def delete_track(track_id):
+    # Abschnitte lösen; die Strecke selbst bleibt erhalten, solange Stoppläne auf sie verweisen
+    db.session.execute(track_section.delete().where(track_section.c.track_id == track_id))
+    if not db.session.query(Stopplan.id).filter(Stopplan.trackID == track_id).first():
+        db.session.execute(db.delete(Track).where(Track.id == track_id))
+
+
+def delete_warning(warning_id):
+    db.session.execute(section_warning.delete().where(section_warning.c.warning_id == warning_id))
+    db.session.execute(db.delete(Warning).where(Warning.id == warning_id))
+
+
+UPSERTS = {'trainStation': upsert_station, 'section': upsert_section, 'track': upsert_track, 'warning': upsert_warning}
+DELETES = {'trainStation': delete_station, 'section': delete_section, 'track': delete_track, 'warning': delete_warning}
+
+
+def apply_track_change(change):
+    # Einen Eintrag aus dem Änderungsprotokoll des Track-Service übernehmen; liefert betroffene Strecken
+    entity, entity_id = change['entity'], change['entityID']
+    if entity not in UPSERTS:
+        return set()
+    if change['operation'] == 'delete':
+        affected = set(tracks_with_section(entity_id)) if entity == 'section' else set()
+        DELETES[entity](entity_id)
+        return affected | ({entity_id} if entity == 'track' else set())
+
+    UPSERTS[entity](change['data'])
+    db.session.flush()
+    if entity == 'section':
+        return set(tracks_with_section(entity_id))
+    return {entity_id} if entity == 'track' else set()
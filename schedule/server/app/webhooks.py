@@ -0,0 +1,21 @@
+import hmac
+from functools import wraps
+
+from flask import request, jsonify
+
+from app import app
+
+WEBHOOK_SECRET_HEADER = 'X-Webhook-Secret'
+
+
+def require_webhook_secret(f):
+    # Webhooks nur mit dem gemeinsamen Geheimnis von Track- und Fleet-Service annehmen;
+    # ohne konfiguriertes WEBHOOK_SECRET sind sie abgeschaltet (Cache-TTL und Replikation greifen weiter)
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        secret = app.config['WEBHOOK_SECRET']
+        provided = request.headers.get(WEBHOOK_SECRET_HEADER, '')
+        if not secret or not hmac.compare_digest(provided.encode(), secret.encode()):
+            return jsonify({'message': 'Ungültiges Webhook-Geheimnis'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,156 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def missing_tables():
+    # Datenbanken aus der Zeit vor den Migrationen wurden mit create_all angelegt;
+    # dort nur fehlende Tabellen und Indizes ergänzen
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    return lambda name: name not in existing
+
+
+def create_index_if_missing(name, table, columns):
+    existing = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+    if name not in existing:
+        op.create_index(name, table, columns)
+
+
+def upgrade():
+    missing = missing_tables()
+
+    if missing('warnings'):
+        op.create_table('warnings',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('description', sa.String(length=255), nullable=False),
+            sa.Column('startDate', sa.DateTime(), nullable=False),
+            sa.Column('endDate', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if missing('trainStations'):
+        op.create_table('trainStations',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('address', sa.String(length=100), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if missing('tracks'):
+        op.create_table('tracks',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if missing('employees'):
+        op.create_table('employees',
+            sa.Column('ssn', sa.String(), nullable=False),
+            sa.Column('firstName', sa.String(), nullable=False),
+            sa.Column('lastName', sa.String(), nullable=False),
+            sa.Column('password', sa.String(), nullable=False),
+            sa.Column('department', sa.Enum('Crew', 'Maintenance', name='department'), nullable=False),
+            sa.Column('role', sa.Enum('Admin', 'Employee', name='role'), nullable=False),
+            sa.Column('username', sa.String(), nullable=False),
+            sa.PrimaryKeyConstraint('ssn'),
+            sa.UniqueConstraint('username')
+        )
+    if missing('sections'):
+        op.create_table('sections',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('usageFee', sa.Float(), nullable=False),
+            sa.Column('length', sa.Float(), nullable=False),
+            sa.Column('maxSpeed', sa.Float(), nullable=False),
+            sa.Column('trackGauge', sa.Integer(), nullable=False),
+            sa.Column('start_station_id', sa.Integer(), nullable=False),
+            sa.Column('end_station_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['start_station_id'], ['trainStations.id']),
+            sa.ForeignKeyConstraint(['end_station_id'], ['trainStations.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if missing('stopplans'):
+        op.create_table('stopplans',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('minPrice', sa.Float(), nullable=True),
+            sa.Column('trackID', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['trackID'], ['tracks.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if missing('track_section'):
+        op.create_table('track_section',
+            sa.Column('track_id', sa.Integer(), nullable=False),
+            sa.Column('section_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['track_id'], ['tracks.id']),
+            sa.ForeignKeyConstraint(['section_id'], ['sections.id']),
+            sa.PrimaryKeyConstraint('track_id', 'section_id')
+        )
+    if missing('trainStation_stopplan'):
+        op.create_table('trainStation_stopplan',
+            sa.Column('trainStation_id', sa.Integer(), nullable=False),
+            sa.Column('stopplan_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['trainStation_id'], ['trainStations.id']),
+            sa.ForeignKeyConstraint(['stopplan_id'], ['stopplans.id']),
+            sa.PrimaryKeyConstraint('trainStation_id', 'stopplan_id')
+        )
+    if missing('section_warning'):
+        op.create_table('section_warning',
+            sa.Column('section_id', sa.Integer(), nullable=False),
+            sa.Column('warning_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['section_id'], ['sections.id']),
+            sa.ForeignKeyConstraint(['warning_id'], ['warnings.id']),
+            sa.PrimaryKeyConstraint('section_id', 'warning_id')
+        )
+    if missing('rideExecutions'):
+        op.create_table('rideExecutions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('price', sa.Float(), nullable=True),
+            sa.Column('isCanceled', sa.Boolean(), nullable=True),
+            sa.Column('delay', sa.Integer(), nullable=True),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('time', sa.Time(), nullable=False),
+            sa.Column('trainID', sa.Integer(), nullable=False),
+            sa.Column('stopplanID', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['stopplanID'], ['stopplans.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if missing('execution_employee'):
+        op.create_table('execution_employee',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('execution_id', sa.Integer(), nullable=True),
+            sa.Column('employee_ssn', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['execution_id'], ['rideExecutions.id']),
+            sa.ForeignKeyConstraint(['employee_ssn'], ['employees.ssn']),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    create_index_if_missing('ix_execution_employee_employee_ssn', 'execution_employee', ['employee_ssn', 'execution_id'])
+    create_index_if_missing('ix_execution_employee_execution_id', 'execution_employee', ['execution_id'])
+    create_index_if_missing('ix_rideExecutions_date_time_trainID', 'rideExecutions', ['date', 'time', 'trainID'])
+    create_index_if_missing('ix_rideExecutions_stopplanID_date_time', 'rideExecutions', ['stopplanID', 'date', 'time'])
+    create_index_if_missing('ix_rideExecutions_trainID_date_time', 'rideExecutions', ['trainID', 'date', 'time'])
+
+
+def downgrade():
+    op.drop_table('execution_employee')
+    op.drop_table('rideExecutions')
+    op.drop_table('section_warning')
+    op.drop_table('trainStation_stopplan')
+    op.drop_table('track_section')
+    op.drop_table('stopplans')
+    op.drop_table('sections')
+    op.drop_table('employees')
+    op.drop_table('tracks')
+    op.drop_table('trainStations')
+    op.drop_table('warnings')
@@ -0,0 +1,31 @@
+"""rideExecutions.batchID
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Spalte und Index können von einem früheren Start ohne Migrationen schon vorhanden sein
+    inspector = sa.inspect(op.get_bind())
+    if 'batchID' not in {column['name'] for column in inspector.get_columns('rideExecutions')}:
+        op.add_column('rideExecutions', sa.Column('batchID', sa.String(length=32), nullable=True))
+    if 'ix_rideExecutions_batchID' not in {index['name'] for index in inspector.get_indexes('rideExecutions')}:
+        op.create_index('ix_rideExecutions_batchID', 'rideExecutions', ['batchID'])
+
+
+def downgrade():
+    op.drop_index('ix_rideExecutions_batchID', table_name='rideExecutions')
+    with op.batch_alter_table('rideExecutions') as batch_op:
+        batch_op.drop_column('batchID')
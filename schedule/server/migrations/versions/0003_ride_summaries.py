@@ -0,0 +1,47 @@
+"""rideDailySummaries and rideMonthlySummaries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'rideDailySummaries' not in existing:
+        op.create_table('rideDailySummaries',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('rides', sa.Integer(), nullable=False),
+            sa.Column('revenue', sa.Float(), nullable=False),
+            sa.Column('stopplanID', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['stopplanID'], ['stopplans.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('stopplanID', 'date')
+        )
+    if 'rideMonthlySummaries' not in existing:
+        op.create_table('rideMonthlySummaries',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('month', sa.Date(), nullable=False),
+            sa.Column('rides', sa.Integer(), nullable=False),
+            sa.Column('revenue', sa.Float(), nullable=False),
+            sa.Column('stopplanID', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['stopplanID'], ['stopplans.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('stopplanID', 'month')
+        )
+
+
+def downgrade():
+    op.drop_table('rideMonthlySummaries')
+    op.drop_table('rideDailySummaries')
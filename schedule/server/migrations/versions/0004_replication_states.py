@@ -0,0 +1,29 @@
+"""replicationStates
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'replicationStates' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('replicationStates',
+            sa.Column('source', sa.String(length=50), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('source')
+        )
+
+
+def downgrade():
+    op.drop_table('replicationStates')
@@ -0,0 +1,27 @@
+"""trainStations.latitude and trainStations.longitude
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 12:50:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('trainStations', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('trainStations', sa.Column('longitude', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('trainStations') as batch_op:
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
@@ -0,0 +1,26 @@
+"""rideExecutions.reportedDelay
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bisherige Verspätungen gelten als gemeldet (NULL = wie delay)
+    op.add_column('rideExecutions', sa.Column('reportedDelay', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('rideExecutions') as batch_op:
+        batch_op.drop_column('reportedDelay')
@@ -0,0 +1,32 @@
+"""rideExecutions.trainID nullable
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 13:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Importierte Fahrten ohne zugeordnetes Fahrzeug haben keinen Zug
+    columns = {column['name']: column for column in sa.inspect(op.get_bind()).get_columns('rideExecutions')}
+    if not columns['trainID']['nullable']:
+        with op.batch_alter_table('rideExecutions') as batch_op:
+            batch_op.alter_column('trainID', existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade():
+    op.execute('DELETE FROM execution_employee WHERE execution_id IN '
+               '(SELECT id FROM "rideExecutions" WHERE "trainID" IS NULL)')
+    op.execute('DELETE FROM "rideExecutions" WHERE "trainID" IS NULL')
+    with op.batch_alter_table('rideExecutions') as batch_op:
+        batch_op.alter_column('trainID', existing_type=sa.Integer(), nullable=False)
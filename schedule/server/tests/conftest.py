@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+# Eigene Datenbank je Testlauf, bevor das App-Paket beim Import das Schema anlegt
+_database_dir = tempfile.mkdtemp()
+os.environ['SCHEDULE_DATABASE_URL'] = f"sqlite:///{os.path.join(_database_dir, 'database.db')}"
+os.environ['TRACK_REPLICATION_IN_PROCESS'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app, db  # noqa: E402
+from app.journeys import timetable  # noqa: E402
+from app.models import Section, Stopplan, Track, TrainStation  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        yield flask_app
+        db.session.rollback()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+        timetable.invalidate()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def line(app, request):
+    # Strecke Nord -> Süd aus Abschnitten von je 60 km bei 120 km/h (30 Minuten Fahrzeit) mit Stopplan 'Linie 1';
+    # per indirekter Parametrisierung anpassbar: stations, coordinates {Name: (lat, lon)}, stopplan=False
+    options = dict({'stations': ('Nord', 'Süd'), 'coordinates': {}, 'stopplan': True}, **getattr(request, 'param', {}))
+    stations = []
+    for position, name in enumerate(options['stations']):
+        latitude, longitude = options['coordinates'].get(name, (None, None))
+        stations.append(TrainStation(name=name, address=chr(ord('A') + position),
+                                     latitude=latitude, longitude=longitude))
+    track = Track(name=f'{stations[0].name}-{stations[-1].name}', sections=[
+        Section(usageFee=1, length=60, maxSpeed=120, trackGauge=1435, start_station=start, end_station=end)
+        for start, end in zip(stations, stations[1:])
+    ])
+    stopplan = Stopplan(name='Linie 1', track=track, trainStations=stations) if options['stopplan'] else None
+    db.session.add(stopplan or track)
+    db.session.commit()
+    return SimpleNamespace(stations=stations, track=track, stopplan=stopplan)
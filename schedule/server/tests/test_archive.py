@@ -0,0 +1,48 @@
+from datetime import date, time, timedelta
+
+import pytest
+
+from app import db
+from app import archive
+from app.archive import archive_rides, read_archived_rides, segment_path
+from app.journeys import timetable
+from app.models import RideExecution
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    return str(tmp_path)
+
+
+def seed(stopplan, days=28):
+    db.session.add_all([RideExecution(date=date(2024, 2, 1) + timedelta(days=day), time=time(hour, 0), trainID=1,
+                                      price=10, isCanceled=False, delay=0, stopplan=stopplan)
+                        for day in range(days) for hour in (6, 12)])
+    db.session.commit()
+
+
+def test_segment_is_decoded_once_per_change(archive_dir, monkeypatch, line):
+    seed(line.stopplan)
+    archive_rides(date(2024, 3, 1), archive_dir)
+    decoded = []
+    decode_segment = archive.decode_segment
+    monkeypatch.setattr(archive, 'decode_segment', lambda path: decoded.append(path) or decode_segment(path))
+
+    first_page = list(read_archived_rides(archive_dir, date(2024, 2, 1)))[:10]
+    after = (first_page[-1].date, first_page[-1].time, first_page[-1].id)
+    second_page = list(read_archived_rides(archive_dir, date(2024, 2, 1), after=after))
+
+    assert len(first_page) + len(second_page) == 10 + 56 - 10
+    assert second_page[0].date == date(2024, 2, 6)
+    assert decoded == [segment_path(archive_dir, date(2024, 2, 1))]
+
+
+def test_archiving_in_another_process_resets_the_timetable(archive_dir, line):
+    seed(line.stopplan, days=1)
+    timetable.watch(archive.generation_path(archive_dir))
+    assert len(timetable.day(date(2024, 2, 1))) == 2
+
+    # Wie der Befehl archive-rides: kein Aufruf von timetable.invalidate()
+    archive_rides(date(2024, 3, 1), archive_dir)
+
+    assert len(timetable.day(date(2024, 2, 1))) == 0
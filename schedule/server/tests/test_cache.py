@@ -0,0 +1,41 @@
+import threading
+import time
+
+from app.cache import TTLCache
+
+
+def test_invalidate_serves_stale_value_while_reloading():
+    started = threading.Event()
+    release = threading.Event()
+    values = iter(['alt', 'neu'])
+
+    def load():
+        value = next(values)
+        if value == 'neu':
+            started.set()
+            release.wait(5)
+        return value
+
+    cache = TTLCache(load, ttl=60)
+    assert cache.get() == 'alt'
+
+    cache.invalidate()
+    # Der langsame Abruf läuft im Hintergrund; Zugriffe warten nicht auf ihn
+    assert cache.get() == 'alt'
+    assert started.wait(5)
+    assert cache.get() == 'alt'
+
+    release.set()
+    for _ in range(100):
+        if cache.get() == 'neu':
+            break
+        time.sleep(0.01)
+    assert cache.get() == 'neu'
+
+
+def test_clear_loads_synchronously():
+    calls = []
+    cache = TTLCache(lambda: calls.append(1) or len(calls), ttl=60)
+    assert cache.get() == 1
+    cache.clear()
+    assert cache.get() == 2
@@ -0,0 +1,45 @@
+from datetime import date, time
+
+import pytest
+
+from app import db
+from app.models import RideExecution
+from app.routes import fleet_trains_cache
+
+TRAINS = [{'trainID': 5, 'name': 'ICE', 'passenger_cars': [{'numberOfSeats': 50}, {'numberOfSeats': 60}]}]
+
+
+@pytest.fixture
+def fleet(monkeypatch):
+    # Fleet-Service durch eine zählende Zugliste ersetzen
+    calls = []
+
+    def load_trains():
+        calls.append(1)
+        return TRAINS
+
+    monkeypatch.setattr(fleet_trains_cache, 'loader', load_trains)
+    fleet_trains_cache.clear()
+    yield calls
+    fleet_trains_cache.clear()
+
+
+def seed(stopplan):
+    db.session.add_all([
+        RideExecution(date=date(2025, 3, 3), time=time(6, 0), trainID=5, price=10, isCanceled=False, delay=0,
+                      stopplan=stopplan),
+        RideExecution(date=date(2025, 3, 3), time=time(6, 30), trainID=9, price=10, isCanceled=False, delay=0,
+                      stopplan=stopplan),
+    ])
+    db.session.commit()
+
+
+def test_capacity_uses_the_cached_train_list(client, fleet, line):
+    seed(line.stopplan)
+
+    for _ in range(3):
+        response = client.get('/capacity?from=2025-03-03&to=2025-03-03&groupBy=day')
+        assert response.status_code == 200
+
+    assert response.get_json()[0]['seats'] == 110
+    assert len(fleet) == 1
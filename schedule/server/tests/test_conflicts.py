@@ -0,0 +1,53 @@
+from app import db
+from app.models import Department, Employee, RideExecution, Role
+
+
+def recurring_rides(stopplan_id, interval, train_id=1, employees=(), **data):
+    # Montag 03.03.2025, 06:00 bis 07:00 Ortszeit im angegebenen Zeitintervall
+    return dict({
+        'startDate': '2025-03-02T23:00:00.000Z',
+        'datumIsEinmalig': True,
+        'zeitIsEinmalig': False,
+        'startTime': '2025-03-03T05:00:00.000Z',
+        'endTime': '2025-03-03T06:00:00.000Z',
+        'zeitIntervall': interval,
+        'price': 10,
+        'stopplanID': stopplan_id,
+        'trainID': train_id,
+        'employeeSSN_list': [{'ssn': ssn} for ssn in employees]
+    }, **data)
+
+
+def test_new_slots_must_not_overlap_each_other(client, line):
+    # 30 Minuten Fahrzeit, alle 10 Minuten: ab der zweiten Fahrt ist der Zug noch unterwegs
+    response = client.post('/create_ride_execution/', json=recurring_rides(line.stopplan.id, 10))
+
+    assert response.status_code == 409
+    assert [conflict['time'] for conflict in response.get_json()['conflicts']] == \
+        ['06:10', '06:20', '06:30', '06:40', '06:50', '07:00']
+    assert RideExecution.query.count() == 0
+
+    preview = client.post('/create_ride_execution/', json=recurring_rides(line.stopplan.id, 10, dryRun=True))
+    assert len(preview.get_json()['trainConflicts']) == 6
+
+
+def test_back_to_back_slots_are_allowed(client, line):
+    response = client.post('/create_ride_execution/', json=recurring_rides(line.stopplan.id, 30))
+
+    assert response.status_code == 201
+    assert len(response.get_json()) == 3
+
+
+def test_crew_conflict_with_numeric_ssn(client, line):
+    # SQLite speichert die SSN in execution_employee als Zahl
+    db.session.add(Employee(ssn='123456789', firstName='Test', lastName='Person', password='x',
+                            department=Department.Crew, role=Role.Employee, username='crew'))
+    db.session.commit()
+    first = recurring_rides(line.stopplan.id, 0, train_id=1, employees=['123456789'], zeitIsEinmalig=True)
+    assert client.post('/create_ride_execution/', json=first).status_code == 201
+
+    second = recurring_rides(line.stopplan.id, 0, train_id=2, employees=['123456789'], zeitIsEinmalig=True)
+    response = client.post('/create_ride_execution/', json=second)
+
+    assert response.status_code == 409
+    assert response.get_json()['conflicts'][0]['employees'] == ['123456789']
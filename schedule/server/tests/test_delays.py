@@ -0,0 +1,90 @@
+from datetime import date, time
+
+from app import db
+from app.models import RideExecution
+
+
+def seed(stopplan):
+    # Fahrzeit 30 Minuten; Zug 1 fährt um 06:00, 06:40 und 07:30
+    rides = [RideExecution(date=date(2025, 3, 3), time=time(hour, minute), trainID=1, price=10, isCanceled=False,
+                           delay=0, stopplan=stopplan) for hour, minute in ((6, 0), (6, 40), (7, 30))]
+    db.session.add_all(rides)
+    db.session.commit()
+    return [ride.id for ride in rides]
+
+
+def set_delay(client, ride_id, delay, **data):
+    response = client.put(f'/ride_execution/{ride_id}', json=dict(data, delay=delay, turnaroundBuffer=10))
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def delays(ride_ids):
+    db.session.expire_all()
+    return [db.session.get(RideExecution, ride_id).delay for ride_id in ride_ids]
+
+
+def test_delay_propagates_to_later_rides_of_the_train(client, line):
+    ride_ids = seed(line.stopplan)
+
+    set_delay(client, ride_ids[0], 20)
+
+    # Ende 06:50 + 10 Minuten Wendezeit -> 07:00 (+20), Ende 07:30 + 10 -> 07:40 (+10)
+    assert delays(ride_ids) == [20, 20, 10]
+
+
+def test_lowering_a_delay_pulls_back_knock_on_delays(client, line):
+    ride_ids = seed(line.stopplan)
+    set_delay(client, ride_ids[0], 20)
+
+    result = set_delay(client, ride_ids[0], 5)
+
+    assert delays(ride_ids) == [5, 5, 0]
+    assert {update['id'] for update in result['propagated']} == set(ride_ids[1:])
+
+    set_delay(client, ride_ids[0], 0)
+    assert delays(ride_ids) == [0, 0, 0]
+
+
+def test_reported_delay_of_a_later_ride_is_kept(client, line):
+    ride_ids = seed(line.stopplan)
+    set_delay(client, ride_ids[2], 15)
+    set_delay(client, ride_ids[0], 20)
+    assert delays(ride_ids) == [20, 20, 15]
+
+    set_delay(client, ride_ids[0], 0)
+
+    assert delays(ride_ids) == [0, 0, 15]
+
+
+def test_canceling_a_ride_pulls_back_its_knock_on_delays(client, line):
+    ride_ids = seed(line.stopplan)
+    set_delay(client, ride_ids[0], 20)
+
+    response = client.put(f'/ride_execution/{ride_ids[0]}', json={'isCanceled': 'Ja', 'turnaroundBuffer': 10})
+
+    assert response.status_code == 200
+    assert delays(ride_ids) == [0, 0, 0]
+
+
+def test_invalid_turnaround_buffer_is_rejected(client, line):
+    ride_ids = seed(line.stopplan)
+
+    for buffer in ('zehn', 2.5, -1, None):
+        response = client.put(f'/ride_execution/{ride_ids[0]}', json={'delay': 5, 'turnaroundBuffer': buffer})
+        assert response.status_code == 400
+
+    assert delays(ride_ids) == [0, 0, 0]
+
+
+def test_bulk_update_rejects_invalid_delay(client, line):
+    ride_ids = seed(line.stopplan)
+
+    for delay in ('abc', -5, 1.5, None):
+        response = client.put('/ride_executions/bulk', json={'ids': ride_ids, 'delay': delay})
+        assert response.status_code == 400
+
+    assert delays(ride_ids) == [0, 0, 0]
+    response = client.put('/ride_executions/bulk', json={'ids': ride_ids, 'delay': '7'})
+    assert response.status_code == 200
+    assert delays(ride_ids) == [7, 7, 7]
@@ -0,0 +1,42 @@
+from datetime import date, time
+
+import pytest
+
+from app import db
+from app.models import RideExecution
+
+# Nord -> Mitte -> Süd: Mitte 30 Minuten nach Nord
+pytestmark = pytest.mark.parametrize('line', [{'stations': ('Nord', 'Mitte', 'Süd')}], indirect=True)
+
+
+def seed(stopplan):
+    db.session.add_all([
+        RideExecution(date=date(2025, 3, 3), time=time(6, 0), trainID=1, price=10, isCanceled=False, delay=5,
+                      stopplan=stopplan),
+        RideExecution(date=date(2025, 3, 3), time=time(23, 50), trainID=1, price=10, isCanceled=False, delay=0,
+                      stopplan=stopplan),
+    ])
+    db.session.commit()
+
+
+def departures(client, station_id, start, window):
+    response = client.get(f'/stations/{station_id}/departures?from={start}&window={window}')
+    assert response.status_code == 200
+    return [(departure['date'], departure['time'], departure['expectedTime'])
+            for departure in response.get_json()['departures']]
+
+
+def test_intermediate_station_uses_its_own_time(client, line):
+    seed(line.stopplan)
+    north_id, middle_id = line.stations[0].id, line.stations[1].id
+
+    assert departures(client, north_id, '2025-03-03T06:00', 10) == [('03.03.2025', '06:00', '06:05')]
+    assert departures(client, middle_id, '2025-03-03T06:00', 10) == []
+    assert departures(client, middle_id, '2025-03-03T06:20', 20) == [('03.03.2025', '06:30', '06:35')]
+
+
+def test_window_after_midnight_includes_rides_from_previous_day(client, line):
+    seed(line.stopplan)
+    middle_id = line.stations[1].id
+
+    assert departures(client, middle_id, '2025-03-04T00:00', 60) == [('04.03.2025', '00:20', '00:20')]
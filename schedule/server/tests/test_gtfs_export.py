@@ -0,0 +1,78 @@
+import csv
+import io
+import zipfile
+from datetime import date, time, timedelta
+
+import pytest
+
+from app import db
+from app.gtfs import generate_gtfs_zip
+from app.gtfs_import import import_gtfs
+from app.models import RideExecution, TrainStation
+
+# Strecke Nord - Mitte - Süd, nur Nord und Süd mit bekannter Lage
+pytestmark = pytest.mark.parametrize('line', [{
+    'stations': ('Nord', 'Mitte', 'Süd'),
+    'coordinates': {'Nord': (52.0, 13.0), 'Süd': (48.0, 11.0)}
+}], indirect=True)
+
+
+def export():
+    data = b''.join(generate_gtfs_zip('Test', 'http://example.org'))
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        return data, {name: list(csv.DictReader(io.TextIOWrapper(archive.open(name), encoding='utf-8')))
+                      for name in archive.namelist()}
+
+
+def seed(stopplan):
+    db.session.add(TrainStation(name='Abseits', address='D'))
+
+    # Montag bis Freitag über zwei Wochen, ohne Mittwoch der ersten Woche; dazu eine einzelne Fahrt
+    first = date(2025, 3, 3)
+    for offset in range(12):
+        day = first + timedelta(days=offset)
+        if day.isoweekday() <= 5 and day != date(2025, 3, 5):
+            db.session.add(RideExecution(date=day, time=time(6, 0), trainID=7, price=10, isCanceled=False, delay=0,
+                                         stopplan=stopplan, batchID='a' * 32))
+    db.session.add(RideExecution(date=date(2025, 3, 8), time=time(9, 30), trainID=7, price=10, isCanceled=False,
+                                 delay=0, stopplan=stopplan, batchID='b' * 32))
+    db.session.commit()
+
+
+def test_stations_without_coordinates_are_left_out(line):
+    seed(line.stopplan)
+    _, files = export()
+
+    stops = {stop['stop_name']: stop for stop in files['stops.txt']}
+    assert set(stops) == {'Nord', 'Süd'}
+    assert (float(stops['Nord']['stop_lat']), float(stops['Nord']['stop_lon'])) == (52.0, 13.0)
+    # Die Fahrten halten nur an Bahnhöfen mit Lage, Fahrzeiten bleiben unverändert
+    trip_id = files['trips.txt'][0]['trip_id']
+    assert [(row['stop_id'], row['departure_time']) for row in files['stop_times.txt'] if row['trip_id'] == trip_id] \
+        == [(str(line.stations[0].id), '06:00:00'), (str(line.stations[2].id), '07:00:00')]
+
+
+def test_recurring_rides_share_one_trip_and_service(line):
+    seed(line.stopplan)
+    _, files = export()
+
+    assert len(files['trips.txt']) == 2
+    calendars = {row['service_id']: row for row in files['calendar.txt']}
+    weekly = next(row for row in calendars.values() if row['start_date'] == '20250303')
+    assert [weekly[day] for day in ('monday', 'friday', 'saturday')] == ['1', '1', '0']
+    assert weekly['end_date'] == '20250314'
+    exceptions = {(row['service_id'], row['date'], row['exception_type']) for row in files['calendar_dates.txt']}
+    assert (weekly['service_id'], '20250305', '2') in exceptions
+    assert len(files['stop_times.txt']) == 2 * 2
+
+
+def test_export_round_trips_through_import(line):
+    seed(line.stopplan)
+    data, _ = export()
+    rides = RideExecution.query.count()
+
+    result = import_gtfs(io.BytesIO(data))
+
+    assert result['createdStations'] == 0
+    assert result['rideExecutions'] == 0
+    assert result['skippedRideExecutions'] == rides
@@ -0,0 +1,110 @@
+import io
+import zipfile
+from datetime import date
+
+import pytest
+
+from app.gtfs_import import import_gtfs
+from app.models import RideExecution, Stopplan, TrainStation
+
+
+def feed(stop_times=None, trips=None):
+    # Kleiner Feed: eine Linie mit zwei Fahrten an Werktagen im März 2025, ein Ausfall und ein Zusatztag
+    files = {
+        'stops.txt': 'stop_id,stop_name,stop_lat,stop_lon\nA,Nord,52.5,13.4\nB,Süd,48.1,11.6\n',
+        'routes.txt': 'route_id,route_short_name,route_type\nR1,Linie 1,2\n',
+        'trips.txt': trips or 'route_id,service_id,trip_id\nR1,WK,T1\nR1,WK,T2\n',
+        'stop_times.txt': stop_times or ('trip_id,arrival_time,departure_time,stop_id,stop_sequence\n'
+                                         'T1,06:00:00,06:00:00,A,1\nT1,07:00:00,07:00:00,B,2\n'
+                                         'T2,25:10:00,25:10:00,A,1\nT2,26:00:00,26:00:00,B,2\n'),
+        'calendar.txt': 'service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,start_date,end_date\n'
+                        'WK,1,1,1,1,1,0,0,20250303,20250314\n',
+        'calendar_dates.txt': 'service_id,date,exception_type\nWK,20250305,2\nWK,20250308,1\n'
+    }
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+# Nur die Strecke anlegen, den Stopplan erzeugt der Import
+track_only = pytest.mark.parametrize('line', [{'stopplan': False}], indirect=True)
+
+
+@track_only
+def test_import_expands_calendar_into_rides(line):
+    result = import_gtfs(feed())
+
+    # 10 Werktage, ohne 05.03., zuzüglich Samstag 08.03.; zwei Fahrten je Tag
+    assert result['createdStations'] == 0
+    assert result['createdStopplans'] == 1
+    assert result['rideExecutions'] == 2 * 10
+    rides = RideExecution.query.order_by(RideExecution.date, RideExecution.time).all()
+    assert len(rides) == 20
+    assert {ride.batchID for ride in rides} == {result['batchID']}
+    assert date(2025, 3, 5) not in {ride.date for ride in rides if ride.time.hour == 6}
+    assert date(2025, 3, 8) in {ride.date for ride in rides if ride.time.hour == 6}
+    # Abfahrt 25:10 zählt zum Folgetag
+    assert {(ride.date, ride.time.hour) for ride in rides if ride.time.hour == 1} >= {(date(2025, 3, 4), 1)}
+
+
+@track_only
+def test_reimport_is_idempotent(line):
+    import_gtfs(feed())
+    counts = (TrainStation.query.count(), Stopplan.query.count(), RideExecution.query.count())
+
+    result = import_gtfs(feed())
+
+    assert result['createdStations'] == 0
+    assert result['createdStopplans'] == 0
+    assert result['rideExecutions'] == 0
+    assert result['skippedRideExecutions'] == 20
+    assert (TrainStation.query.count(), Stopplan.query.count(), RideExecution.query.count()) == counts
+
+
+def test_bad_row_leaves_nothing_behind(app):
+    bad_stop_times = ('trip_id,arrival_time,departure_time,stop_id,stop_sequence\n'
+                      'T1,06:00:00,06:00:00,A,1\nT1,07:00:00,07:00:00,B,2\n'
+                      'T2,kaputt,kaputt,A,1\n')
+
+    with pytest.raises(ValueError):
+        import_gtfs(feed(bad_stop_times))
+
+    assert TrainStation.query.count() == 0
+    assert Stopplan.query.count() == 0
+    assert RideExecution.query.count() == 0
+
+
+@track_only
+def test_trips_are_mapped_to_trains_by_block(line):
+    trips = 'route_id,service_id,trip_id,block_id\nR1,WK,T1,U1\nR1,WK,T2,U2\n'
+
+    result = import_gtfs(feed(trips=trips), {'U1': 4})
+
+    rides = RideExecution.query.all()
+    assert {ride.trainID for ride in rides if ride.time.hour == 6} == {4}
+    assert {ride.trainID for ride in rides if ride.time.hour == 1} == {None}
+    assert result['rideExecutionsWithoutTrain'] == 10
+
+
+@track_only
+def test_delay_of_a_ride_without_train_does_not_propagate(client, line):
+    import_gtfs(feed())
+    ride = RideExecution.query.filter_by(date=date(2025, 3, 3)).order_by(RideExecution.time).first()
+
+    response = client.put(f'/ride_execution/{ride.id}', json={'delay': 90, 'turnaroundBuffer': 10})
+
+    assert response.status_code == 200
+    assert response.get_json()['propagated'] == []
+
+
+@track_only
+def test_rides_are_inserted_in_chunks(line):
+    result = import_gtfs(feed(), batch_size=3)
+    assert result['rideExecutions'] == 20
+
+    result = import_gtfs(feed(), batch_size=3)
+    assert result['rideExecutions'] == 0
+    assert result['skippedRideExecutions'] == 20
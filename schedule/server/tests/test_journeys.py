@@ -0,0 +1,52 @@
+from datetime import date, time
+
+import pytest
+
+from app import db
+from app.models import RideExecution, Stopplan
+
+# Nord -> Mitte -> Süd, je 30 Minuten Fahrzeit
+pytestmark = pytest.mark.parametrize('line', [{'stations': ('Nord', 'Mitte', 'Süd')}], indirect=True)
+
+
+def test_through_ride_is_not_split_at_a_shared_stop(client, line):
+    north, middle, south = line.stations
+    # Kurzfahrt Nord -> Mitte mit kleinerer ID, durchgehende Fahrt gleichzeitig ab Nord
+    short = Stopplan(name='Linie 2', track=line.track, trainStations=[north, middle])
+    db.session.add_all([
+        RideExecution(date=date(2025, 3, 3), time=time(8, 0), trainID=2, price=10, isCanceled=False, delay=0,
+                      stopplan=short),
+        RideExecution(date=date(2025, 3, 3), time=time(8, 0), trainID=1, price=10, isCanceled=False, delay=0,
+                      stopplan=line.stopplan),
+    ])
+    db.session.commit()
+    through_id = RideExecution.query.filter_by(trainID=1).one().id
+
+    response = client.get(f'/journeys?from={north.id}&to={south.id}&departure=2025-03-03T07:30&minTransfer=5')
+
+    assert response.status_code == 200
+    assert response.get_json()['legs'] == [{
+        'rideExecutionID': through_id, 'fromStationID': north.id, 'toStationID': south.id,
+        'departure': '03.03.2025 08:00', 'arrival': '03.03.2025 09:00'
+    }]
+
+
+def test_transfer_between_rides(client, line):
+    north, middle, south = line.stations
+    first = Stopplan(name='Linie 2', track=line.track, trainStations=[north, middle])
+    second = Stopplan(name='Linie 3', track=line.track, trainStations=[middle, south])
+    db.session.add_all([
+        RideExecution(date=date(2025, 3, 3), time=time(8, 0), trainID=1, price=10, isCanceled=False, delay=0,
+                      stopplan=first),
+        RideExecution(date=date(2025, 3, 3), time=time(8, 40), trainID=2, price=10, isCanceled=False, delay=0,
+                      stopplan=second),
+    ])
+    db.session.commit()
+
+    response = client.get(f'/journeys?from={north.id}&to={south.id}&departure=2025-03-03T07:30&minTransfer=5')
+
+    legs = response.get_json()['legs']
+    assert [(leg['fromStationID'], leg['toStationID'], leg['departure'], leg['arrival']) for leg in legs] == [
+        (north.id, middle.id, '03.03.2025 08:00', '03.03.2025 08:30'),
+        (middle.id, south.id, '03.03.2025 08:40', '03.03.2025 09:10'),
+    ]
@@ -0,0 +1,73 @@
+from datetime import date, time
+
+from sqlalchemy import event
+
+from app import db
+from app.models import (Department, Employee, RideExecution, Role, Section, Stopplan, Track, TrainStation,
+                        track_section)
+
+
+def seed(stopplans, rides_per_stopplan):
+    # Stoppläne mit je zwei Bahnhöfen und Fahrten, jede Fahrt mit zwei Mitarbeitern
+    first = Employee.query.count()
+    employees = [
+        Employee(ssn=f'000-00-{number:04d}', firstName='Test', lastName=f'Person {number}', password='x',
+                 department=Department.Crew, role=Role.Employee, username=f'crew{number}')
+        for number in range(first, first + 4)
+    ]
+    db.session.add_all(employees)
+    for number in range(stopplans):
+        start = TrainStation(name=f'Start {number}', address='A')
+        end = TrainStation(name=f'Ende {number}', address='B')
+        section = Section(usageFee=1, length=60, maxSpeed=120, trackGauge=1435, start_station=start, end_station=end)
+        track = Track(name=f'Strecke {number}', sections=[section])
+        stopplan = Stopplan(name=f'Stopplan {number}', track=track, trainStations=[start, end])
+        db.session.add(stopplan)
+        for ride in range(rides_per_stopplan):
+            db.session.add(RideExecution(
+                date=date(2025, 1, 1 + ride % 28), time=time(ride % 24, 0), trainID=number, price=10,
+                isCanceled=False, delay=0, stopplan=stopplan, employees=employees[ride % 3:ride % 3 + 2]
+            ))
+    db.session.commit()
+
+
+def count_statements(client, url):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url)
+        response.get_data()  # Gestreamte Antworten erst hier vollständig erzeugen
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    assert response.status_code == 200
+    return len(statements), response
+
+
+def test_stopplans_query_count_does_not_grow_with_data(app, client):
+    seed(stopplans=2, rides_per_stopplan=2)
+    small_count, small_response = count_statements(client, '/stopplans')
+    assert len(small_response.get_json()) == 2
+
+    seed(stopplans=8, rides_per_stopplan=10)
+    large_count, large_response = count_statements(client, '/stopplans')
+    stopplans = large_response.get_json()
+    assert len(stopplans) == 10
+    assert sum(len(stopplan['rideExecutions']) for stopplan in stopplans) == 2 * 2 + 8 * 10
+    assert all(len(ride['employees']) == 2 for stopplan in stopplans for ride in stopplan['rideExecutions'])
+
+    assert large_count == small_count
+
+
+def test_stopplans_stream_query_count_does_not_grow_with_data(app, client):
+    seed(stopplans=2, rides_per_stopplan=2)
+    small_count, _ = count_statements(client, '/stopplans?format=ndjson')
+
+    seed(stopplans=8, rides_per_stopplan=10)
+    large_count, response = count_statements(client, '/stopplans?format=ndjson')
+    assert len(response.get_data(as_text=True).splitlines()) == 10
+
+    assert large_count == small_count
@@ -0,0 +1,43 @@
+import pytest
+
+from app.routes import fleet_trains_cache
+from app.webhooks import WEBHOOK_SECRET_HEADER
+
+
+@pytest.fixture
+def secret(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'WEBHOOK_SECRET', 'geheim')
+    return 'geheim'
+
+
+@pytest.fixture
+def cached_trains(monkeypatch):
+    # Zugliste vorab laden, damit ein erfolgreicher Webhook sie als abgelaufen markiert
+    monkeypatch.setattr(fleet_trains_cache, 'loader', lambda: [])
+    fleet_trains_cache.get()
+    yield
+    fleet_trains_cache.clear()
+
+
+@pytest.mark.parametrize('url', [
+    '/webhooks/fleet/trains',
+    '/webhooks/track/changes',
+])
+def test_webhooks_reject_missing_or_wrong_secret(client, secret, url):
+    assert client.post(url, json={}).status_code == 403
+    assert client.post(url, json={}, headers={WEBHOOK_SECRET_HEADER: 'falsch'}).status_code == 403
+
+
+def test_webhooks_disabled_without_configured_secret(client, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'WEBHOOK_SECRET', None)
+    assert client.post('/webhooks/fleet/trains', headers={WEBHOOK_SECRET_HEADER: ''}).status_code == 403
+
+
+def test_fleet_webhook_with_secret_invalidates_cache(client, secret, cached_trains):
+    generation = fleet_trains_cache._generation
+    assert client.post('/webhooks/fleet/trains').status_code == 403
+    assert fleet_trains_cache._generation == generation
+
+    response = client.post('/webhooks/fleet/trains', headers={WEBHOOK_SECRET_HEADER: secret})
+    assert response.status_code == 200
+    assert fleet_trains_cache._generation == generation + 1
@@ -5,6 +5,7 @@ from routes.TrainStationRoutes import trainstation_blueprint
 from routes.WarningRoutes import warning_blueprint
 from routes.SectionRoutes import section_blueprint
 from routes.TrackRoutes import track_blueprint
+from routes.ChangeRoutes import change_blueprint
 from flask_cors import CORS
 
 # Flask-App erstellen
@@ -19,6 +20,7 @@ app.register_blueprint(trainstation_blueprint, url_prefix='/track/train-stations
 app.register_blueprint(warning_blueprint, url_prefix='/track/warnings')  # Endpunkte für Warnungen
 app.register_blueprint(section_blueprint, url_prefix='/track/sections')  # Endpunkte für Abschnitte
 app.register_blueprint(track_blueprint, url_prefix='/track/tracks')  # Endpunkte für Strecken
+app.register_blueprint(change_blueprint, url_prefix='/track/changes')  # Änderungsprotokoll für Replikate
 
 # Aktivieren von CORS für App
 CORS(app)
@@ -0,0 +1,95 @@
+# Änderungsprotokoll für Bahnhöfe, Abschnitte, Strecken und Warnungen
+import json
+from sqlalchemy.sql import text
+from models.ChangeLog import ChangeLog
+from models.TrainStation import TrainStation
+from models.Section import Section
+from models.Track import Track
+from models.Warning import Warning
+from models.SectionWarning import section_warning
+# Registriert den after_commit-Hook, der den Schedule-Service nach protokollierten Änderungen anstößt
+import notifications  # noqa: F401
+
+
+# Änderung in derselben Transaktion wie die Änderung selbst vormerken, damit Log und Daten übereinstimmen
+def record_change(session, entity, entity_id, payload=None):
+    session.add(ChangeLog(
+        entity=entity,
+        entityID=entity_id,
+        operation='delete' if payload is None else 'upsert',
+        payload=json.dumps(payload) if payload is not None else None
+    ))
+    session.info['changes_recorded'] = True
+
+
+def station_payload(station):
+    return {'stationID': station.stationID, 'stationName': station.stationName, 'address': station.address}
+
+
+def section_payload(session, section):
+    warning_ids = session.execute(section_warning.select().with_only_columns(section_warning.c.warningID).where(
+        section_warning.c.sectionID == section.sectionID)).scalars().all()
+    return {
+        'sectionID': section.sectionID,
+        'usageFee': section.usageFee,
+        'length': section.length,
+        'maxSpeed': section.maxSpeed,
+        'trackGauge': section.trackGauge,
+        'startStationID': section.startStationID,
+        'endStationID': section.endStationID,
+        'warningIDs': sorted(warning_ids)
+    }
+
+
+# Strecke samt Abschnitten in Reihenfolge (Format von GET /track/tracks/<id> ohne Warnungen)
+def track_payload(session, track):
+    sections = session.execute(text("""
+        SELECT section.sectionID, section.usageFee, section.length, section.maxSpeed, section.trackGauge,
+               section.startStationID, section.endStationID
+        FROM track_section
+        JOIN section ON track_section.sectionID = section.sectionID
+        WHERE track_section.trackID = :trackID
+        ORDER BY track_section.sequence ASC
+    """), {"trackID": track.trackID}).fetchall()
+
+    return {
+        'trackID': track.trackID,
+        'trackName': track.trackName,
+        'sections': [
+            {
+                "sectionID": section.sectionID,
+                "usageFee": section.usageFee,
+                "length": section.length,
+                "maxSpeed": section.maxSpeed,
+                "trackGauge": section.trackGauge,
+                "startStationID": section.startStationID,
+                "endStationID": section.endStationID
+            }
+            for section in sections
+        ]
+    }
+
+
+def warning_payload(warning):
+    return {
+        'warningID': warning.warningID,
+        'warningName': warning.warningName,
+        'description': warning.description,
+        'startDate': warning.startDate.strftime('%Y-%m-%d %H:%M:%S'),
+        'endDate': warning.endDate.strftime('%Y-%m-%d %H:%M:%S') if warning.endDate else None,
+    }
+
+
+# Beim ersten Start den aktuellen Bestand als Ausgangsversion protokollieren
+def seed_change_log(session):
+    if session.query(ChangeLog.version).first():
+        return
+    for station in session.query(TrainStation).order_by(TrainStation.stationID):
+        record_change(session, 'trainStation', station.stationID, station_payload(station))
+    for warning in session.query(Warning).order_by(Warning.warningID):
+        record_change(session, 'warning', warning.warningID, warning_payload(warning))
+    for section in session.query(Section).order_by(Section.sectionID):
+        record_change(session, 'section', section.sectionID, section_payload(session, section))
+    for track in session.query(Track).order_by(Track.trackID):
+        record_change(session, 'track', track.trackID, track_payload(session, track))
+    session.commit()
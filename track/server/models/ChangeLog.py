@@ -0,0 +1,15 @@
+# Modell für das Änderungsprotokoll (Change Data Capture) der Streckendaten
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from models.Base import Base
+from datetime import datetime, timezone
+
+class ChangeLog(Base):
+    __tablename__ = 'changeLog'
+
+    # Spalten der Tabelle; die Version steigt mit jeder Änderung streng monoton
+    version = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String, nullable=False)  # trainStation, section, track oder warning
+    entityID = Column(Integer, nullable=False)
+    operation = Column(String, nullable=False)  # upsert oder delete
+    payload = Column(Text, nullable=True)  # Vollständiger Zustand als JSON, bei delete leer
+    createdAt = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
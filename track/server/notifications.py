@@ -0,0 +1,37 @@
+# Benachrichtigung des Schedule-Service über neue Einträge im Änderungsprotokoll
+import os
+import threading
+import requests
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+
+SCHEDULE_WEBHOOK_URL = 'http://127.0.0.1:5000/webhooks/track'
+# Gemeinsames Geheimnis mit dem Schedule-Service; ohne Geheimnis werden keine Webhooks gesendet
+WEBHOOK_SECRET = os.environ.get('WEBHOOK_SECRET')
+
+
+# Anfrage im Hintergrund senden, damit die Antwort des Track-Service nicht blockiert wird
+def _post(url, payload):
+    if not WEBHOOK_SECRET:
+        return  # Schedule übernimmt die Änderungen über die periodische Replikation
+
+    def send():
+        try:
+            requests.post(url, json=payload, headers={'X-Webhook-Secret': WEBHOOK_SECRET}, timeout=2)
+        except requests.RequestException:
+            pass  # Schedule ist nicht erreichbar, die lokale Kopie wird beim nächsten Abruf erneuert
+
+    threading.Thread(target=send, daemon=True).start()
+
+
+# Nach jedem Commit mit protokollierten Änderungen den Replikator des Schedule-Service anstoßen
+@event.listens_for(OrmSession, 'after_commit')
+def notify_changes(session):
+    if session.info.pop('changes_recorded', False):
+        _post(f'{SCHEDULE_WEBHOOK_URL}/changes', {})
+
+
+# Verworfene Transaktionen lösen keine Benachrichtigung aus
+@event.listens_for(OrmSession, 'after_rollback')
+def discard_changes(session):
+    session.info.pop('changes_recorded', None)
@@ -0,0 +1,53 @@
+# Change-Feed-Endpunkte
+from flask import Blueprint, jsonify, request
+from models.ChangeLog import ChangeLog
+from changelog import seed_change_log
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+import json
+import os
+
+# Datenbankverbindung einrichten
+DATABASE_URL = f"sqlite:///{os.path.abspath('server/db/track.db')}"
+engine = create_engine(DATABASE_URL, echo=True)
+Session = sessionmaker(bind=engine)
+
+# Protokolltabelle anlegen und beim ersten Start mit dem aktuellen Bestand füllen
+ChangeLog.__table__.create(engine, checkfirst=True)
+with Session() as seed_session:
+    seed_change_log(seed_session)
+
+change_blueprint = Blueprint('change_routes', __name__)
+
+MAX_CHANGES = 1000
+
+# Endpoint: Änderungen nach einer Version in Versionsreihenfolge abrufen
+@change_blueprint.route('/', methods=['GET'])
+def get_changes():
+    since = request.args.get('since', 0, type=int)
+    limit = min(request.args.get('limit', MAX_CHANGES, type=int), MAX_CHANGES)
+    if since < 0 or limit < 1:
+        return jsonify({"message": "'since' darf nicht negativ und 'limit' muss positiv sein"}), 400
+
+    session = Session()
+    try:
+        changes = session.query(ChangeLog).filter(ChangeLog.version > since) \
+            .order_by(ChangeLog.version.asc()).limit(limit).all()
+        latest_version = session.query(func.max(ChangeLog.version)).scalar() or 0
+
+        return jsonify({
+            'changes': [
+                {
+                    'version': change.version,
+                    'entity': change.entity,
+                    'entityID': change.entityID,
+                    'operation': change.operation,
+                    'data': json.loads(change.payload) if change.payload else None
+                }
+                for change in changes
+            ],
+            'version': changes[-1].version if changes else since,
+            'latestVersion': latest_version
+        })
+    finally:
+        session.close()
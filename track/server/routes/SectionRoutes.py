@@ -4,6 +4,7 @@ from models.Section import Section, validate_station
 from models.Warning import Warning
 from models.SectionWarning import section_warning
 from models.TrackSection import track_section
+from changelog import record_change, section_payload
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import exists, select
@@ -119,6 +120,8 @@ def create_section():
 
                 session.execute(section_warning.insert().values(sectionID=new_section.sectionID, warningID=warning_id))
 
+        session.flush()
+        record_change(session, 'section', new_section.sectionID, section_payload(session, new_section))
         session.commit()
 
         return jsonify({
@@ -178,6 +181,8 @@ def update_section(section_id):
                     return jsonify({"message": f"Warning mit ID {warning_id} existiert nicht"}), 400
                 session.execute(section_warning.insert().values(sectionID=section.sectionID, warningID=warning_id))
 
+        session.flush()
+        record_change(session, 'section', section.sectionID, section_payload(session, section))
         session.commit()
         return jsonify({
             'sectionID': section.sectionID,
@@ -213,6 +218,7 @@ def delete_section(section_id):
         # Abschnitt und zugehörige Warnungen löschen
         session.execute(section_warning.delete().where(section_warning.c.sectionID == section_id))
         session.delete(section)
+        record_change(session, 'section', section_id)
         session.commit()
         return jsonify({"message": f"Section mit ID {section_id} wurde erfolgreich gelöscht"}), 200
     except Exception as e:
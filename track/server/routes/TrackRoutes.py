@@ -2,6 +2,7 @@
 from flask import Blueprint, jsonify, request
 from models.Track import Track
 from models.TrackSection import track_section
+from changelog import record_change, track_payload
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import text
@@ -152,7 +153,8 @@ def create_track():
         # Validierung der Abschnittsreihenfolge
         new_track.validate_section_sequence(section_ids, session)
         session.add(new_track)
-        session.commit()
+        # Nur flush für die trackID: Strecke, Zuordnungen und Protokolleintrag in einer Transaktion
+        session.flush()
 
         # Abschnitte der Strecke zuordnen
         for index, section_id in enumerate(section_ids):
@@ -161,6 +163,7 @@ def create_track():
                 sectionID=section_id,
                 sequence=index
             ))
+        record_change(session, 'track', new_track.trackID, track_payload(session, new_track))
         session.commit()
     except ValueError as e:
         session.rollback()
@@ -201,6 +204,7 @@ def update_track(track_id):
                     sectionID=section_id,
                     sequence=index
                 ))
+        record_change(session, 'track', track.trackID, track_payload(session, track))
         session.commit()
     except ValueError as e:
         session.rollback()
@@ -228,6 +232,7 @@ def delete_track(track_id):
 
         # Strecke löschen
         session.delete(track)
+        record_change(session, 'track', track_id)
         session.commit()
 
         return jsonify({"message": f"Track mit ID {track_id} wurde erfolgreich gelöscht"}), 200
@@ -2,6 +2,7 @@
 from flask import Blueprint, jsonify, request
 from models.TrainStation import TrainStation
 from models.Section import Section
+from changelog import record_change, station_payload
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import IntegrityError
@@ -50,6 +51,8 @@ def create_trainstation():
         # Neuen Bahnhof erstellen
         new_station = TrainStation(stationName=data['stationName'], address=data['address'])
         session.add(new_station)
+        session.flush()
+        record_change(session, 'trainStation', new_station.stationID, station_payload(new_station))
         session.commit()
 
         return jsonify({'stationID': new_station.stationID, 'stationName': new_station.stationName, 'address': new_station.address}), 201
@@ -88,6 +91,8 @@ def update_trainstation(station_id):
             station.stationName = data['stationName']
         if 'address' in data:
             station.address = data['address']
+        session.flush()
+        record_change(session, 'trainStation', station.stationID, station_payload(station))
         session.commit()
 
         return jsonify({'stationID': station.stationID, 'stationName': station.stationName, 'address': station.address}), 200
@@ -116,6 +121,7 @@ def delete_trainstation(station_id):
 
     # Bahnhof löschen
     session.delete(station)
+    record_change(session, 'trainStation', station_id)
     session.commit()
 
     return jsonify({"message": f"Bahnhof mit ID {station_id} wurde erfolgreich gelöscht"}), 200
\ No newline at end of file
@@ -2,6 +2,7 @@
 from flask import Blueprint, jsonify, request
 from models.Warning import Warning
 from models.SectionWarning import section_warning
+from changelog import record_change, warning_payload
 from sqlalchemy import create_engine, delete
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import IntegrityError
@@ -30,6 +31,8 @@ def get_warnings():
         session.execute(delete(section_warning).where(section_warning.c.warningID.in_(expired_ids)))
         # Abgelaufene Warnungen löschen
         session.query(Warning).filter(Warning.warningID.in_(expired_ids)).delete(synchronize_session='fetch')
+        for warning_id in expired_ids:
+            record_change(session, 'warning', warning_id)
         session.commit()
 
     # Abrufen aktiver Warnungen
@@ -101,6 +104,8 @@ def create_warning():
             endDate=end_date
         )
         session.add(new_warning)
+        session.flush()
+        record_change(session, 'warning', new_warning.warningID, warning_payload(new_warning))
         session.commit()
 
         return jsonify({